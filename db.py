@@ -1,18 +1,93 @@
-from models import user_quotes, user_authors
+from models import user_quotes, user_authors, user_tags, quote_tags, quote_categories
 from utilities import Validator
 from typing import Optional, Dict, Any, Union, Tuple
-from sqlalchemy import func, and_, or_, select, desc, asc
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import func, and_, or_, select, desc, asc, insert, update, delete, event, inspect, bindparam, literal, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as OrmSession, selectinload, raiseload, defer, ONETOMANY
 from datetime import datetime
 import re
+from contextlib import contextmanager
 
-from models import Session, Quote, Author, Category, User, Tag
-from typing import Optional, List, TypeVar, Generic, Type
+from models import RAISELOAD, SEARCH_TABLES, search_tables_ready, QUOTE_TSVECTOR, Session, SessionFactory, Quote, Author, Category, User, Tag
+from typing import Optional, List, TypeVar, Generic, Type, Iterable, Iterator
+from itertools import islice
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from abc import ABC, abstractmethod
-from errors import NotFoundError, ValidationError, DatabaseError, DuplicateError, assert_that
+from errors import NotFoundError, ValidationError, DatabaseError, DuplicateError
 
 T = TypeVar('T')
 
+# Rows per INSERT statement for bulk creates
+BATCH_SIZE = 10_000
+
+# Entries kept per repository by the by_name/by_email/count/all cache
+CACHE_SIZE = 4096
+
+# Bulk user creates with at least this many passwords hash them in a process pool
+PARALLEL_HASH_MIN = 32
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _hash_executor() -> ProcessPoolExecutor:
+    """Process pool for bulk password hashing - started on first use and reused after"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor()
+    return _hash_pool
+
+
+_LIKE_SPECIALS = re.compile(r'[\\%_]')
+
+
+def _like_pattern(query: str) -> Tuple[str, Optional[str]]:
+    """'%query%' matching the query literally - returns (pattern, escape char or None if nothing needed escaping)
+
+    Unescaped patterns keep the plain LIKE form that the SQLite FTS5 index can serve.
+    """
+    if _LIKE_SPECIALS.search(query) is None:
+        return f"%{query}%", None
+    escaped = _LIKE_SPECIALS.sub(r'\\\g<0>', query)
+    return f"%{escaped}%", '\\'
+
+
+def _column_search_filter(field, pattern, escape: Optional[str], session):
+    """field ILIKE pattern - as a lookup in the FTS5 trigram table shadowing field when that table exists"""
+    fts = SEARCH_TABLES.get(field.class_)
+    if fts is None or not search_tables_ready(session.get_bind()):
+        return field.ilike(pattern, escape=escape)
+    return field.class_.id.in_(select(fts.c.rowid).where(fts.c[field.key].like(pattern, escape=escape)))
+
+
+def quote_search_filter(text: str, session):
+    """WHERE criterion matching quotes containing text literally - the same match as QuoteRepository.search()"""
+    return _column_search_filter(Quote.text, *_like_pattern(text), session)
+
+
+# Registered on the ORM Session class itself, so repositories built on any session get it
+@event.listens_for(OrmSession, 'after_flush')
+@event.listens_for(OrmSession, 'after_commit')
+@event.listens_for(OrmSession, 'after_soft_rollback')
+@event.listens_for(OrmSession, 'after_transaction_end')
+def _bump_generation(session, *args) -> None:
+    """Invalidate repository caches whenever the session writes, commits, rolls back or closes
+
+    after_transaction_end covers close(), which detaches every cached instance.
+    """
+    session.info['generation'] = session.info.get('generation', 0) + 1
+
+
+# Relationships each repository's list queries load up front, keyed by model class
+EAGER_LOADS = {
+    Quote: (Quote.author, Quote.tags, Quote.categories),
+    Author: (Author.quotes, Author.tags, Author.users),
+    Tag: (Tag.quotes, Tag.authors, Tag.users),
+    Category: (Category.quotes,),
+    User: (User.quotes, User.authors, User.tags),
+}
+
+
 class Repository(ABC, Generic[T]):
     """Generic repository for database operations"""
     
@@ -20,47 +95,85 @@ class Repository(ABC, Generic[T]):
         self.session = session
         self.model = model
         self.validator = Validator(session)
+        self._cache = OrderedDict()
+        self._options = self._eager_options()
+        
+        # Built once and reused - only the bound value changes between calls
+        if hasattr(model, 'name'):
+            self._by_name_stmt = select(model).where(model.name == bindparam('name')).options(*self._options).limit(1)
+        self._search_field = model.text if model.__name__ == 'Quote' else model.name
+        self._search_stmt = self._search_statement()
+
+    def _cached(self, key, loader):
+        """Return loader() memoized (LRU, CACHE_SIZE entries) until the session next flushes, commits or rolls back"""
+        if self.session.new or self.session.dirty or self.session.deleted:
+            return loader()  # pending changes - let autoflush run
+        generation = self.session.info.get('generation', 0)
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] == generation:
+            self._cache.move_to_end(key)
+            return hit[1]
+        value = loader()
+        self._cache[key] = (generation, value)
+        self._cache.move_to_end(key)
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return value
+
+    def _eager_options(self) -> tuple:
+        """Eager loading options from EAGER_LOADS - Q_RAISELOAD=1 makes any other lazy load raise
+
+        Built once per repository in __init__ - use self._options.
+        """
+        options = tuple(selectinload(rel) for rel in EAGER_LOADS.get(self.model, ()))
+        return options + (raiseload('*'),) if RAISELOAD else options
+
+    def _search_filter(self, pattern, escape: Optional[str] = None):
+        """ILIKE on the searched column - answered from the FTS5 trigram table when SQLite supports it"""
+        return _column_search_filter(self._search_field, pattern, escape, self.session)
+
+    def _search_statement(self, escape: Optional[str] = None):
+        """search() statement with the LIKE pattern left as a bound parameter"""
+        return select(self.model).where(self._search_filter(bindparam('pattern'), escape)).options(*self._options)
+
+    def _eager_load(self, stmt):
+        """Apply eager loading based on model type to a select()"""
+        return stmt.options(*self._options) if self._options else stmt
 
-    def _eager_load(self, query):
-        """Apply eager loading based on model type"""
-        from sqlalchemy.orm import joinedload, selectinload
-        
-        if self.model.__name__ == 'Quote':
-            return query.options(
-                joinedload(Quote.author),
-                selectinload(Quote.tags),
-                selectinload(Quote.categories)
-            )
-        elif self.model.__name__ == 'Author':
-            return query.options(
-                selectinload(Author.quotes),
-                selectinload(Author.tags),
-                selectinload(Author.users)
-            )
-        elif self.model.__name__ == 'Tag':
-            return query.options(
-                selectinload(Tag.quotes),
-                selectinload(Tag.authors),
-                selectinload(Tag.users)
-            )
-        elif self.model.__name__ == 'Category':
-            return query.options(
-                selectinload(Category.quotes)
-            )
-        elif self.model.__name__ == 'User':
-            return query.options(
-                selectinload(User.quotes),
-                selectinload(User.authors),
-                selectinload(User.tags)
-            )
+    def _require(self, model, id: int):
+        """Get any model by primary key - served from the identity map when already loaded"""
+        record = self.session.get(model, id)
+        if record is None:
+            raise NotFoundError(f"{model.__name__} {id} not found")
+        return record
+
+    def _require_all(self, model, ids: Iterable[int]) -> None:
+        """Raise NotFoundError unless every id exists - one IN query per BATCH_SIZE ids, for bulk links"""
+        ids = set(ids)
+        batches = iter(ids)
+        while batch := list(islice(batches, BATCH_SIZE)):
+            missing = set(batch).difference(self.session.scalars(select(model.id).where(model.id.in_(batch))))
+            if missing:
+                raise NotFoundError(f"{model.__name__} {min(missing)} not found")
+
+    def _commit(self) -> None:
+        """Commit - or inside DB.transaction(), flush and leave the commit to the end of the block"""
+        if self.session.info.get('transaction_depth'):
+            self.session.flush()
+            _bump_generation(self.session)  # Core writes don't flush, so invalidate caches here
         else:
-            return query
+            self.session.commit()
+
+    def _rollback(self) -> None:
+        """Roll back a failed write - inside DB.transaction() the block's exit rolls back instead"""
+        if not self.session.info.get('transaction_depth'):
+            self.session.rollback()
 
 
     def add(self, obj: T) -> T:
         """Add to the session and commit"""
         self.session.add(obj)
-        self.session.commit()
+        self._commit()
         return obj
     
     def create(self, **kwargs) -> T:
@@ -76,9 +189,62 @@ class Repository(ABC, Generic[T]):
         
         # Persist
         self.session.add(validated_obj)
-        self.session.commit()
+        self._commit()
         return validated_obj
 
+    def _insert_unique(self, obj: T, message: str) -> T:
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING in one statement - DuplicateError if nothing was inserted
+
+        Only for models whose unique constraints match the validator's duplicate rules.
+        """
+        values = {column.key: getattr(obj, column.key) for column in self.model.__table__.columns
+                  if getattr(obj, column.key) is not None}
+        stmt = sqlite_insert(self.model).values(values).on_conflict_do_nothing().returning(self.model)
+        try:
+            created = self.session.scalars(stmt).first()
+        except Exception as e:
+            self._rollback()
+            raise e
+        if created is None:
+            raise DuplicateError(message)  # nothing was written, so nothing to roll back
+        self._commit()
+        return created
+
+    def create_many(self, rows: Iterable[Dict[str, Any]], skip_duplicates: bool = False) -> int:
+        """Bulk insert rows in batches of BATCH_SIZE - returns the number of rows sent
+
+        Rows are inserted as given: no sanitization or duplicate checks are run.
+
+        Args:
+            rows: Column dicts, e.g. [{'text': '...', 'author_id': 1}, ...]
+            skip_duplicates: If True, rows hitting a unique constraint are skipped (ON CONFLICT DO NOTHING)
+        """
+        stmt = sqlite_insert(self.model).on_conflict_do_nothing() if skip_duplicates else insert(self.model)
+
+        total = 0
+        rows = iter(rows)
+        try:
+            while True:
+                batch = list(islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                self._check_required(batch)
+                self.session.execute(stmt, batch)
+                total += len(batch)
+            self._commit()
+        except Exception as e:
+            self._rollback()
+            raise e
+        return total
+
+    def _check_required(self, batch: List[Dict[str, Any]]) -> None:
+        """Reject bulk rows whose text/name is blank"""
+        field = 'text' if self.model.__name__ == 'Quote' else 'name'
+        for row in batch:
+            value = row.get(field)
+            if not value or value.isspace():
+                raise ValidationError(f"{self.model.__name__} {field} cannot be empty")
+
     def update(self, id: int, **kwargs) -> T:
         """Update an object with validation"""
         # Get the object
@@ -98,95 +264,158 @@ class Repository(ABC, Generic[T]):
             raise DuplicateError(f"{self.model.__name__} with these values already exists")
         
         # Commit the changes
-        self.session.commit()
+        self._commit()
         return validated_obj        
 
     def get(self, id: int) -> T:
-        """Get record by ID with eager loading"""
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        record = query.filter_by(id=id).first()
+        """Get record by ID with eager loading - no query if it is already in the session"""
+        record = self.session.get(self.model, id, options=self._options)
         
-        assert_that(not record).raiseNotFoundError(f"{self.model.__name__} {id} not found")
+        if record is None:
+            raise NotFoundError(f"{self.model.__name__} {id} not found")
         return record
 
+    def by_ids(self, ids: Iterable[int]) -> List[T]:
+        """Get records by id with eager loading in one query (ordered by id) - missing ids are skipped"""
+        ids = list(ids)
+        if not ids:
+            return []
+        stmt = self._eager_load(select(self.model).where(self.model.id.in_(ids)).order_by(self.model.id))
+        return self.session.scalars(stmt).all()
+
     def all(self) -> List[T]:
-        """Get all records with eager loading"""
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.all()
+        """Get all records with eager loading - cached until the next write"""
+        def load():
+            stmt = self._eager_load(select(self.model))
+            return tuple(self.session.scalars(stmt).all())
+        return list(self._cached('all', load))
 
+    def iter_all(self, batch: int = 1000) -> Iterator[T]:
+        """Stream all records with eager loading, holding only one batch in memory at a time"""
+        stmt = select(self.model).options(*self._options).execution_options(yield_per=batch)
+        yield from self.session.execute(stmt).scalars()
+
+    def iter_columns(self, *columns, batch: int = 10_000) -> Iterator[Tuple]:
+        """Stream plain row tuples for the given columns (e.g. for exports) - skips ORM objects entirely"""
+        columns = columns or tuple(self.model.__table__.columns)
+        yield from self.session.execute(select(*columns).execution_options(yield_per=batch))
+
+
+    def _unlink(self, ids: List[int]) -> None:
+        """Remove association rows and null out foreign keys that point at the given ids"""
+        for rel in inspect(self.model).relationships:
+            if rel.secondary is not None:
+                # Many-to-many - drop the rows in the association table
+                for column in rel.secondary.c:
+                    if column.references(self.model.__table__.c.id):
+                        self.session.execute(delete(rel.secondary).where(column.in_(ids)))
+            elif rel.direction is ONETOMANY:
+                # One-to-many (author.quotes) - detach the children, as the ORM would
+                for _, remote in rel.local_remote_pairs:
+                    self.session.execute(update(remote.table).where(remote.in_(ids)).values({remote.name: None}))
 
     def delete(self, id: int) -> bool:
-        """Delete a record - removes associations first"""
+        """Delete a record in one DELETE ... RETURNING - removes associations first
+
+        Associations go before the row so enforced foreign keys never see a dangling
+        reference; 'fetch' synchronization drops the deleted object from the session.
+        """
         try:
-            record = self.get(id)
-            if record:
-                # Delete many-to-many associations first (fast)
-                if hasattr(record, 'tags'):
-                    record.tags.clear()
-                if hasattr(record, 'categories'):
-                    record.categories.clear()
-                if hasattr(record, 'users'):
-                    record.users.clear()
-                
-                # Now delete the record
-                self.session.delete(record)
-                self.session.commit()
-                return True
-            return False
+            self._unlink([id])
+            deleted = self.session.execute(
+                delete(self.model).where(self.model.id == id).returning(self.model.id)
+                .execution_options(synchronize_session='fetch')
+            ).scalar()
+            if deleted is None:
+                raise NotFoundError(f"{self.model.__name__} {id} not found")
+            
+            self._commit()
+            return True
         except Exception as e:
-            self.session.rollback()
+            self._rollback()
+            raise e
+
+    def delete_many(self, ids: Iterable[int]) -> int:
+        """Delete records by id with one DELETE ... WHERE id IN (...) per BATCH_SIZE ids - returns rows deleted"""
+        total = 0
+        ids = iter(ids)
+        try:
+            while True:
+                batch = list(islice(ids, BATCH_SIZE))
+                if not batch:
+                    break
+                self._unlink(batch)
+                result = self.session.execute(
+                    delete(self.model).where(self.model.id.in_(batch)).execution_options(synchronize_session='fetch')
+                )
+                total += result.rowcount
+            self._commit()
+        except Exception as e:
+            self._rollback()
             raise e
+        return total
 
     def count(self) -> int:
-        """Get total count"""
-        return self.session.query(self.model).count()
+        """Get total count - cached until the next write"""
+        return self._cached('count', lambda: self.session.execute(select(func.count()).select_from(self.model)).scalar_one())
+
+    def count_where(self, **kwargs) -> int:
+        """Count records matching attribute values, e.g. count_where(needs_review=True)"""
+        return self.session.execute(select(func.count()).select_from(self.model).filter_by(**kwargs)).scalar_one()
 
     def filter_by(self, **kwargs) -> List[T]:
         """Filter records by attributes with eager loading"""
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.filter_by(**kwargs).all()
+        stmt = self._eager_load(select(self.model))
+        return self.session.scalars(stmt.filter_by(**kwargs)).all()
+
+    def search(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[T]:
+        """Search records with eager loading - pass limit/offset to fetch one page (ordered by id)"""
+        pattern, escape = _like_pattern(query)
+        stmt = self._search_stmt if escape is None else self._search_statement(escape)
+        if limit is not None or offset:
+            stmt = stmt.order_by(self.model.id).limit(limit).offset(offset)
+        return self.session.execute(stmt, {'pattern': pattern}).scalars().all()
+
+    def search_stream(self, query: str, batch: int = 200) -> Iterator[T]:
+        """Yield search results batch by batch (yield_per) instead of building the whole list"""
+        pattern, escape = _like_pattern(query)
+        stmt = self._search_stmt if escape is None else self._search_statement(escape)
+        yield from self.session.execute(stmt, {'pattern': pattern}, execution_options={'yield_per': batch}).scalars()
 
-    def search(self, query: str) -> List[T]:
-        """Search records with eager loading"""
-        search_field = self.model.text if self.model.__name__ == 'Quote' else self.model.name
-        query_obj = self.session.query(self.model)
-        query_obj = self._eager_load(query_obj)
-        return query_obj.filter(search_field.ilike(f"%{query}%")).all()
+    def search_rows(self, query: str, *columns, batch: int = 200) -> Iterator[Tuple]:
+        """Stream (id, text/name) tuples for a search - for list pages that don't need ORM objects"""
+        columns = columns or (self.model.id, self._search_field)
+        stmt = select(*columns).where(self._search_filter(*_like_pattern(query)))
+        yield from self.session.execute(stmt.execution_options(yield_per=batch))
 
     def by_name(self, name: str) -> Optional[T]:
-        """Get record by name with eager loading"""
-        assert_that(self.model.__name__ == 'Quote').raiseNotImplementedError("Quote doesn't have a name attribute")
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.filter_by(name=name).first()
+        """Get record by name with eager loading - cached until the next write"""
+        return self._cached(('by_name', name),
+                            lambda: self.session.execute(self._by_name_stmt, {'name': name}).scalars().first())
+
+    def ids_by_name(self, names: Iterable[str]) -> Dict[str, int]:
+        """Resolve many names to ids in one query - for bulk imports where names repeat"""
+        stmt = select(self.model.name, self.model.id).where(self.model.name.in_(set(names)))
+        return dict(self.session.execute(stmt).all())
 
     def by_tag(self, tag_id: int) -> List[T]:
         """Get quotes, authors, users by tag with eager loading"""
-        assert_that(self.model.__name__ == 'Category' or self.model.__name__ == 'Tag').raiseNotImplementedError(f"{self.model.__name__} doesn't have tags")
-        tag = self.session.query(Tag).get(tag_id)
-        assert_that(not tag).raiseNotFoundError(f"Tag {tag_id} not found")
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.where(self.model.tags.any(Tag.id == tag_id)).all()
+        self._require(Tag, tag_id)
+        stmt = self._eager_load(select(self.model))
+        return self.session.scalars(stmt.where(self.model.tags.any(Tag.id == tag_id))).all()
 
     def by_user(self, user_id: int) -> List[T]:
         """Get quotes, authors, tags by user with eager loading"""
-        assert_that(self.model.__name__ == 'Category' or self.model.__name__ == 'User').raiseNotImplementedError(f"{self.model.__name__} doesn't have users")
-        user = self.session.query(User).get(user_id)
-        assert_that(not user).raiseNotFoundError(f"User {user_id} not found")
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.where(self.model.users.any(User.id == user_id)).all()
+        self._require(User, user_id)
+        stmt = self._eager_load(select(self.model))
+        return self.session.scalars(stmt.where(self.model.users.any(User.id == user_id))).all()
 
     def get_needs_review(self) -> List[T]:
-        """Get records that need review with eager loading"""
-        assert_that(self.model.__name__ == 'Category').raiseNotImplementedError("Category doesn't have needs_review attribute")
-        query = self.session.query(self.model)
-        query = self._eager_load(query)
-        return query.filter_by(needs_review=True).all()
+        """Get records that need review with eager loading - cached until the next write"""
+        def load():
+            stmt = self._eager_load(select(self.model))
+            return tuple(self.session.scalars(stmt.filter_by(needs_review=True)).all())
+        return list(self._cached('needs_review', load))
 
 
 
@@ -231,50 +460,170 @@ class Repository(ABC, Generic[T]):
 class QuoteRepository(Repository[Quote]):
     """Quote-specific repository"""
 
-    def by_author(self, author_id: int) -> List[Quote]:
-        """Get quotes by author"""
-        return self.filter_by(author_id=author_id)
+    def by_name(self, name: str) -> Optional[Quote]:
+        """Not supported for this model"""
+        raise NotImplementedError("Quote doesn't have a name attribute")
+
+    def ids_by_name(self, names: Iterable[str]) -> Dict[str, int]:
+        """Not supported for this model"""
+        raise NotImplementedError("Quote doesn't have a name attribute")
+
+    def create_many(self, rows: Iterable[Dict[str, Any]], skip_duplicates: bool = False) -> int:
+        """Bulk insert quotes - rows may also carry 'tag_ids'/'category_ids' lists to link
+
+        The new ids come back from the INSERT's RETURNING, so the links are inserted
+        in bulk too, in the same transaction. Linked ids must exist (NotFoundError).
+
+        Args:
+            rows: Column dicts, e.g. [{'text': '...', 'author_id': 1, 'tag_ids': [3, 4]}, ...]
+            skip_duplicates: If True, rows whose text already exists - or repeats an earlier
+                row - are skipped, as the validator's duplicate check would reject them
+
+        Returns the number of quotes inserted.
+        """
+        links = {'tag_ids': (quote_tags, 'tag_id', Tag), 'category_ids': (quote_categories, 'category_id', Category)}
+        stmt = insert(Quote).returning(Quote.id, sort_by_parameter_order=True)
+
+        total = 0
+        taken = set()
+        rows = iter(rows)
+        try:
+            while True:
+                batch = [dict(row) for row in islice(rows, BATCH_SIZE)]
+                if not batch:
+                    break
+                self._check_required(batch)
+                if skip_duplicates:
+                    texts = {row['text'] for row in batch} - taken
+                    taken.update(self.session.scalars(select(Quote.text).where(Quote.text.in_(texts))))
+                    kept = []
+                    for row in batch:
+                        if row['text'] not in taken:
+                            taken.add(row['text'])
+                            kept.append(row)
+                    batch = kept
+                    if not batch:
+                        continue
+                linked = [{key: row.pop(key, ()) for key in links} for row in batch]
+                for key, (_, _, model) in links.items():
+                    self._require_all(model, (other_id for row_links in linked for other_id in row_links[key]))
+                ids = self.session.scalars(stmt, batch).all()
+                for key, (table, column, _) in links.items():
+                    pairs = [{'quote_id': quote_id, column: other_id}
+                             for quote_id, row_links in zip(ids, linked) for other_id in row_links[key]]
+                    if pairs:
+                        self.session.execute(insert(table), pairs)
+                total += len(ids)
+            self._commit()
+        except Exception as e:
+            self._rollback()
+            raise e
+        return total
+
+    def link(self, quote_id: int, tag_ids: Iterable[int] = (), category_ids: Iterable[int] = ()) -> int:
+        """Attach tags/categories to a quote - one INSERT per association table, existing links skipped
+
+        Returns the number of links added. Raises NotFoundError for a missing quote, tag or category.
+        """
+        self._require(Quote, quote_id)
+        added = 0
+        for table, column, model, ids in ((quote_tags, quote_tags.c.tag_id, Tag, tag_ids),
+                                          (quote_categories, quote_categories.c.category_id, Category, category_ids)):
+            ids = set(ids)
+            if not ids:
+                continue
+            self._require_all(model, ids)
+            existing = set(self.session.scalars(select(column).where(table.c.quote_id == quote_id, column.in_(ids))))
+            rows = [{'quote_id': quote_id, column.key: other_id} for other_id in ids - existing]
+            if rows:
+                self.session.execute(insert(table), rows)
+                added += len(rows)
+        self._commit()
+        return added
+
+    def search_words(self, query: str) -> List[Quote]:
+        """Search quotes by (stemmed) words - PostgreSQL full-text index, substring search elsewhere"""
+        if self.session.get_bind().dialect.name != 'postgresql':
+            return self.search(query)
+        stmt = select(Quote).where(QUOTE_TSVECTOR.op('@@')(func.plainto_tsquery('english', query)))
+        return self.session.execute(stmt.options(*self._options)).scalars().all()
+
+    def by_author(self, author_id: int, with_text: bool = True) -> List[Quote]:
+        """Get quotes by author - with_text=False defers loading the (potentially large) text column"""
+        if with_text:
+            return self.filter_by(author_id=author_id)
+        stmt = self._eager_load(select(Quote)).options(defer(Quote.text))
+        return self.session.scalars(stmt.filter_by(author_id=author_id)).all()
+
+    def by_author_ids(self, author_id: int, limit: Optional[int] = None, offset: int = 0) -> List[int]:
+        """Get just the ids of an author's quotes - answered from the author_id index alone"""
+        stmt = select(Quote.id).where(Quote.author_id == author_id).order_by(Quote.id).limit(limit).offset(offset)
+        return self.session.execute(stmt).scalars().all()
+
+    def by_tag(self, tag_id: int) -> List[Quote]:
+        """Get quotes with a tag in one query, relationships preloaded"""
+        self._require(Tag, tag_id)
+        stmt = select(Quote).join(Quote.tags).where(Tag.id == tag_id).options(*self._options)
+        return self.session.execute(stmt).scalars().all()
         
     def by_category(self, category_id: int) -> List[Quote]:
-        """Get quotes in a category"""
-        category = self.session.query(Category).get(category_id)
-        assert_that(not category).raiseNotFoundError(f"Category {category_id} not found")
-        return category.quotes
+        """Get quotes in a category in one query, relationships preloaded"""
+        self._require(Category, category_id)
+        stmt = select(Quote).join(Quote.categories).where(Category.id == category_id).options(*self._options)
+        return self.session.execute(stmt).scalars().all()
 
     def get_quotes_without_author(self) -> List[Quote]:
-        """Get all quotes without an author"""
-        return self.session.query(self.model).filter(self.model.author_id.is_(None)).all()
+        """Get all quotes without an author - cached until the next write"""
+        return list(self._cached('without_author', lambda: tuple(
+            self.session.scalars(select(Quote).where(Quote.author_id.is_(None))).all())))
+
+_BY_EMAIL_STMT = select(User).where(User.email == bindparam('email')).limit(1)
 
 class UserRepository(Repository[User]):
     """User-specific repository"""
     
+    def by_user(self, user_id: int) -> List[User]:
+        """Not supported for this model"""
+        raise NotImplementedError("User doesn't have users")
+
     def create(self, name: str, email: str, password: str) -> User:
         """Create a user with password handling"""
-        user = User(name=name, email=email)
-        user.set_password(password)  # Special handling
+        # Hash first - the slow, CPU-bound step runs before any query opens a transaction
+        user = User(name=name, email=email, password_hash=User.hash_password(password))
         
-        # Then validate
-        validated_user = self.validator.validate(user)
+        # Then validate - the unique name/email constraints catch duplicates in the INSERT itself
+        validated_user = self.validator.validate(user, check_duplicates=False)
+        return self._insert_unique(validated_user, "User with this name or email already exists")
+
+    def create_many(self, rows: Iterable[Dict[str, Any]], skip_duplicates: bool = False) -> int:
+        """Bulk insert users - plain 'password' values are hashed before the INSERT
+
+        Larger batches are hashed across processes so the INSERTs run with no CPU work in between.
+        """
+        rows = [dict(row) for row in rows]
+        pending = [row for row in rows if 'password' in row]
+        passwords = [row.pop('password') for row in pending]
         
-        if validated_user is False:
-            raise DuplicateError("User with this name or email already exists")
+        if len(passwords) >= PARALLEL_HASH_MIN:
+            hashes = list(_hash_executor().map(User.hash_password, passwords, chunksize=16))
+        else:
+            hashes = [User.hash_password(password) for password in passwords]
         
-        self.session.add(validated_user)
-        self.session.commit()
-        return validated_user
-    
+        for row, password_hash in zip(pending, hashes):
+            row['password_hash'] = password_hash
+        return super().create_many(rows, skip_duplicates=skip_duplicates)
+
     def update(self, id: int, **kwargs) -> User:
         """Update a user with special password handling"""
+        # Special handling for password - hashed before the user is loaded
+        if 'password' in kwargs:
+            kwargs['password_hash'] = User.hash_password(kwargs.pop('password'))
+        
         # Get the user
         user = self.get(id)
         if not user:
             raise NotFoundError(f"User with ID {id} not found")
         
-        # Special handling for password
-        if 'password' in kwargs:
-            password = kwargs.pop('password')
-            user.set_password(password)
-        
         # Update other attributes
         for key, value in kwargs.items():
             if hasattr(user, key):
@@ -287,34 +636,134 @@ class UserRepository(Repository[User]):
             raise DuplicateError("User with this name or email already exists")
         
         # Commit changes
-        self.session.commit()
+        self._commit()
         return validated_user
 
     def by_email(self, email: str) -> Optional[User]:
-        """Get user by email"""
-        return self.session.query(User).filter_by(email=email).first()
+        """Get user by email - cached until the next write"""
+        return self._cached(('by_email', email), lambda: self.session.execute(_BY_EMAIL_STMT, {'email': email}).scalars().first())
 
     def by_quote(self, quote_id: int) -> List[User]:
         """Get users by quote"""
-        quote = self.session.query(Quote).get(quote_id)
-        assert_that(not quote).raiseNotFoundError(f"Quote {quote_id} not found")
-        return quote.users
+        return self._require(Quote, quote_id).users
     
     def by_author(self, author_id: int) -> List[User]:
         """Get users by author"""
-        author = self.session.query(Author).get(author_id)
-        assert_that(not author).raiseNotFoundError(f"Author {author_id} not found")
-        return author.users
+        return self._require(Author, author_id).users
+
+    def has_quote(self, user_id: int, quote_id: int) -> bool:
+        """Check if a user saved a quote - probes user_quotes without loading user.quotes"""
+        return self._has_link(user_quotes.c.quote_id, user_id, quote_id)
+
+    def has_author(self, user_id: int, author_id: int) -> bool:
+        """Check if a user follows an author - probes user_authors without loading user.authors"""
+        return self._has_link(user_authors.c.author_id, user_id, author_id)
+
+    def add_quote(self, user_id: int, quote_id: int) -> bool:
+        """Save a quote for a user - False if it was already saved"""
+        return self._add_link(user_quotes.c.quote_id, Quote, user_id, quote_id)
+
+    def remove_quote(self, user_id: int, quote_id: int) -> bool:
+        """Remove a saved quote - False if it wasn't saved"""
+        return self._remove_link(user_quotes.c.quote_id, user_id, quote_id)
+
+    def add_author(self, user_id: int, author_id: int) -> bool:
+        """Follow an author - False if already followed"""
+        return self._add_link(user_authors.c.author_id, Author, user_id, author_id)
+
+    def remove_author(self, user_id: int, author_id: int) -> bool:
+        """Unfollow an author - False if it wasn't followed"""
+        return self._remove_link(user_authors.c.author_id, user_id, author_id)
+
+    def _has_link(self, column, user_id: int, other_id: int) -> bool:
+        """EXISTS probe on a user association table"""
+        link = select(column.table).where(column.table.c.user_id == user_id, column == other_id)
+        return self.session.execute(select(link.exists())).scalar()
+
+    def _add_link(self, column, model, user_id: int, other_id: int) -> bool:
+        """Insert a user association row unless it exists - the collections are never loaded"""
+        self._require(User, user_id)
+        self._require(model, other_id)
+        if self._has_link(column, user_id, other_id):
+            return False
+        self.session.execute(insert(column.table).values({'user_id': user_id, column.key: other_id}))
+        self._commit()
+        return True
+
+    def _remove_link(self, column, user_id: int, other_id: int) -> bool:
+        """Delete a user association row - True if one was removed"""
+        result = self.session.execute(delete(column.table).where(column.table.c.user_id == user_id, column == other_id))
+        self._commit()
+        return result.rowcount > 0
+
+    def counts(self, user_id: int) -> Dict[str, int]:
+        """Count a user's quotes, authors and tags in one query - without loading the collections"""
+        self._require(User, user_id)
+        links = {'quotes': user_quotes, 'authors': user_authors, 'tags': user_tags}
+        row = self.session.execute(select(*(
+            select(func.count()).select_from(table).where(table.c.user_id == user_id).scalar_subquery().label(name)
+            for name, table in links.items()
+        ))).one()
+        return dict(row._mapping)
 
 class AuthorRepository(Repository[Author]):
     """Author-specific repository"""
         
 class CategoryRepository(Repository[Category]):
     """Category-specific repository"""
+
+    def by_tag(self, tag_id: int) -> List[Category]:
+        """Not supported for this model"""
+        raise NotImplementedError("Category doesn't have tags")
+
+    def by_user(self, user_id: int) -> List[Category]:
+        """Not supported for this model"""
+        raise NotImplementedError("Category doesn't have users")
+
+    def get_needs_review(self) -> List[Category]:
+        """Not supported for this model"""
+        raise NotImplementedError("Category doesn't have needs_review attribute")
       
 class TagRepository(Repository[Tag]):
     """Tag-specific repository"""
 
+    def by_tag(self, tag_id: int) -> List[Tag]:
+        """Not supported for this model"""
+        raise NotImplementedError("Tag doesn't have tags")
+
+    def create(self, **kwargs) -> Tag:
+        """Create a tag - sanitized names are lowercase, so the unique constraint catches duplicates"""
+        validated_tag = self.validator.validate(Tag(**kwargs), check_duplicates=False)
+        return self._insert_unique(validated_tag, "Tag already exists")
+
+    def ids_for_names(self, names: Iterable[str]) -> Dict[str, int]:
+        """Sanitize names, create any missing tags and return {sanitized name: id}
+
+        Existing tags are left alone (ON CONFLICT DO NOTHING), so a whole import's worth of
+        names costs one INSERT per BATCH_SIZE names plus one SELECT - not a lookup per name.
+        """
+        names = {self.validator.validate(Tag(name=name), check_duplicates=False).name for name in names}
+        if not names:
+            return {}
+        stmt = sqlite_insert(Tag).on_conflict_do_nothing()
+        batches = iter(names)
+        try:
+            while True:
+                batch = list(islice(batches, BATCH_SIZE))
+                if not batch:
+                    break
+                self.session.execute(stmt, [{'name': name} for name in batch])
+            self._commit()
+        except Exception as e:
+            self._rollback()
+            raise e
+        return self.ids_by_name(names)
+
+    def orphaned_ids(self) -> List[int]:
+        """Ids of tags not applied to any quote, author or user - one NOT EXISTS query, e.g. for delete_many()"""
+        stmt = select(Tag.id).where(~Tag.quotes.any(), ~Tag.authors.any(), ~Tag.users.any())
+        return self.session.scalars(stmt).all()
+
 
 
 
@@ -329,31 +778,81 @@ class SearchFacade:
         self._categories = categories
         self._tags = tags
         self.session = session
+        
+        # Built once and reused - only the bound pattern changes between calls
+        self._repositories = {'quotes': quotes, 'authors': authors, 'categories': categories, 'tags': tags}
+        self._rows_stmt = self._rows_statement()
+        self._ids_stmt = self._ids_statement()
+
+    def _rows_statement(self, escape: Optional[str] = None):
+        """UNION ALL of every repository's search, tagged by kind, with the pattern as a bound parameter"""
+        return union_all(*(
+            select(literal(kind).label('kind'), repo.model.id, repo._search_field.label('label'))
+            .where(repo._search_filter(bindparam('pattern'), escape))
+            for kind, repo in self._repositories.items()
+        ))
     
-    def all(self, query: str) -> dict:
-        """Search across all models"""
-        return {
-            'quotes': self._quotes.search(query),
-            'authors': self._authors.search(query),
-            'categories': self._categories.search(query),
-            'tags': self._tags.search(query)
-        }
+    def _ids_statement(self, escape: Optional[str] = None, limit: Optional[int] = None):
+        """UNION ALL of (kind, id) for every repository's search - limit caps each branch"""
+        branches = []
+        for kind, repo in self._repositories.items():
+            branch = select(literal(kind).label('kind'), repo.model.id.label('id')).where(repo._search_filter(bindparam('pattern'), escape))
+            if limit is not None:
+                # SQLite can't LIMIT a UNION member directly, so cap it inside a subquery
+                branch = select(branch.order_by(repo.model.id).limit(limit).subquery())
+            branches.append(branch)
+        return union_all(*branches)
     
-    def quotes(self, query: str) -> List[Quote]:
+    def all(self, query: str, limit: Optional[int] = None) -> dict:
+        """Search across all models - limit caps the results per model
+
+        Matching ids for every model come back from one UNION ALL query, then each model
+        with hits is loaded once by id, so eager loading only runs for the rows found.
+        """
+        pattern, escape = _like_pattern(query)
+        stmt = self._ids_stmt if escape is None and limit is None else self._ids_statement(escape, limit)
+        ids = {kind: [] for kind in self._repositories}
+        for kind, id in self.session.execute(stmt, {'pattern': pattern}):
+            ids[kind].append(id)
+        return {kind: repo.by_ids(ids[kind]) for kind, repo in self._repositories.items()}
+    
+    def counts(self, query: str) -> Dict[str, int]:
+        """Number of matches per model in one query - without loading any rows"""
+        pattern, escape = _like_pattern(query)
+        row = self.session.execute(select(*(
+            select(func.count()).select_from(repo.model).where(repo._search_filter(pattern, escape)).scalar_subquery().label(kind)
+            for kind, repo in self._repositories.items()
+        ))).one()
+        return dict(row._mapping)
+
+    def rows(self, query: str) -> dict:
+        """Search across all models returning lightweight (id, text/name) rows - one UNION ALL round trip"""
+        pattern, escape = _like_pattern(query)
+        stmt = self._rows_stmt if escape is None else self._rows_statement(escape)
+        results = {kind: [] for kind in self._repositories}
+        for kind, id, label in self.session.execute(stmt, {'pattern': pattern}):
+            results[kind].append((id, label))
+        return results
+
+    def quotes(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Quote]:
         """Search quotes"""
-        return self._quotes.search(query)
+        return self._quotes.search(query, limit=limit, offset=offset)
+    
+    def quotes_stream(self, query: str, batch: int = 200) -> Iterator[Quote]:
+        """Search quotes lazily - e.g. islice(stream, offset, offset + limit) for a page"""
+        return self._quotes.search_stream(query, batch=batch)
     
-    def authors(self, query: str) -> List[Author]:
+    def authors(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Author]:
         """Search authors"""
-        return self._authors.search(query)
+        return self._authors.search(query, limit=limit, offset=offset)
 
-    def categories(self, query: str) -> List[Category]:
+    def categories(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Category]:
         """Search categories"""
-        return self._categories.search(query)
+        return self._categories.search(query, limit=limit, offset=offset)
     
-    def tags(self, query: str) -> List[Category]:
+    def tags(self, query: str, limit: Optional[int] = None, offset: int = 0) -> List[Category]:
         """Search tags"""
-        return self._tags.search(query)
+        return self._tags.search(query, limit=limit, offset=offset)
 
     def by_categories(self, category_names: List[str], match_all: bool = False) -> List[Quote]:
         """Search quotes by multiple categories
@@ -362,22 +861,7 @@ class SearchFacade:
             category_names: List of category names
             match_all: If True, quotes must be in ALL categories. If False, ANY category.
         """
-        _categories = [self.session.query(Category).filter_by(name=name).first() for name in category_names]
-        _categories = [c for c in _categories if c is not None]
-        
-        if not _categories:
-            return []
-        
-        if match_all:
-            _quotes = set(_categories[0].quotes)
-            for category in _categories[1:]:
-                _quotes = _quotes.intersection(set(category.quotes))
-            return list(_quotes)
-        else:
-            _quotes = set()
-            for category in _categories:
-                _quotes.update(category.quotes)
-            return list(_quotes)
+        return self._quotes_by_names(Quote.categories, Category, category_names, match_all)
     
     def by_tags(self, tag_names: List[str], match_all: bool = False) -> List[Quote]:
         """Search quotes by multiple tags
@@ -386,22 +870,31 @@ class SearchFacade:
             tag_names: List of tag names to search for
             match_all: If True, quotes must have ALL tags. If False, quotes with ANY tag.
         """
-        _tags = [self._tags.by_name(name) for name in tag_names]
-        _tags = [t for t in _tags if t is not None]
+        return self._quotes_by_names(Quote.tags, Tag, tag_names, match_all)
+
+    def _quotes_by_names(self, relationship, model, names: List[str], match_all: bool) -> List[Quote]:
+        """Quotes linked to any/all of the named tags or categories, matched in one query
         
-        if not _tags:
+        Names that don't exist are ignored, so match_all only requires the ones that do.
+        """
+        names = set(names)
+        if not names:
             return []
         
-        if match_all:
-            _quotes = set(_tags[0].quotes)
-            for tag in _tags[1:]:
-                _quotes = _quotes.intersection(set(tag.quotes))
-            return list(_quotes)
-        else:
-            _quotes = set()
-            for tag in _tags:
-                _quotes.update(tag.quotes)
-            return list(_quotes)
+        stmt = select(Quote).where(self._linked_to_names(relationship, model, names, match_all))
+        return self.session.execute(stmt.options(*self._quotes._options)).scalars().all()
+
+    def _linked_to_names(self, relationship, model, names: set, match_all: bool):
+        """Criterion for quotes linked to any/all of the named tags or categories
+        
+        any is an EXISTS probe per quote; all is a GROUP BY / HAVING over the association rows.
+        """
+        if not match_all:
+            return relationship.any(model.name.in_(names))
+        existing = select(func.count()).select_from(model).where(model.name.in_(names)).scalar_subquery()
+        ids = (select(Quote.id).join(relationship).where(model.name.in_(names)).group_by(Quote.id)
+               .having(func.count(func.distinct(model.id)) == existing))
+        return Quote.id.in_(ids)
         
     def advanced(self, text: str = None, author: str = None, 
                  tags: List[str] = None, categories: List[str] = None,
@@ -416,32 +909,29 @@ class SearchFacade:
             match_all_tags: If True, quote must have all tags
             match_all_categories: If True, quote must be in all categories
         """
-        results = None
+        criteria = []
         
-        # Start with text search if provided
+        # Text search if provided
         if text:
-            results = set(self._quotes.search(text))
+            criteria.append(self._quotes._search_filter(*_like_pattern(text)))
         
         # Filter by author if provided
         if author:
-            author_obj = self._authors.by_name(author)
-            if author_obj:
-                author_quotes = set(author_obj.quotes)
-                results = results.intersection(author_quotes) if results else author_quotes
-            else:
-                return []
+            criteria.append(Quote.author.has(Author.name == author))
         
         # Filter by tags if provided
         if tags:
-            tag_quotes = set(self.by_tags(tags, match_all=match_all_tags))
-            results = results.intersection(tag_quotes) if results else tag_quotes
+            criteria.append(self._linked_to_names(Quote.tags, Tag, set(tags), match_all_tags))
         
         # Filter by categories if provided
         if categories:
-            cat_quotes = set(self.by_categories(categories, match_all=match_all_categories))
-            results = results.intersection(cat_quotes) if results else cat_quotes
+            criteria.append(self._linked_to_names(Quote.categories, Category, set(categories), match_all_categories))
+        
+        if not criteria:
+            return []
         
-        return list(results) if results else []
+        stmt = select(Quote).where(*criteria).options(*self._quotes._options)
+        return self.session.execute(stmt).scalars().all()
     
 
 
@@ -454,7 +944,11 @@ class DB:
     """Database access layer with repositories and facades"""
 
     def __init__(self):
-        self.session = Session()
+        # Pool sizing is read from Q_POOL / Q_OVERFLOW when models.py builds the engine
+        self.session = SessionFactory()
+        # DB instances on one thread share this scoped session; the last one to close removes it
+        self.session.info['db_refs'] = self.session.info.get('db_refs', 0) + 1
+        self._closed = False
         
         # Initialize repositories
         self.quotes = QuoteRepository(self.session, Quote)
@@ -467,17 +961,44 @@ class DB:
         self.search = SearchFacade(self.quotes, self.authors, self.categories, self.tags, self.session)
         
 
-    def enter(self):
+    def __enter__(self):
         """Enter the context manager"""
         return self
 
-    def exit(self, exc_type, exc_value, traceback):
+    @contextmanager
+    def transaction(self):
+        """Group repository writes into one commit at the end of the block
+
+        Repositories only flush inside the block. Any exception leaving it rolls back every write made in it.
+        Blocks may nest - only the outermost one commits. A nested block runs in a SAVEPOINT, so its
+        exception undoes just its own writes and the enclosing block can carry on.
+        """
+        info = self.session.info
+        depth = info.get('transaction_depth', 0)
+        savepoint = self.session.begin_nested() if depth else None
+        info['transaction_depth'] = depth + 1
+        try:
+            yield self
+        except Exception:
+            if savepoint is not None:
+                savepoint.rollback()
+            else:
+                self.session.rollback()
+            raise
+        finally:
+            info['transaction_depth'] -= 1
+        if savepoint is not None:
+            savepoint.commit()
+        else:
+            self.commit()
+
+    def __exit__(self, exc_type, exc_value, traceback):
         """Exit the context manager"""
         if exc_type:
             self.session.rollback()
         else:
             self.session.commit()
-        self.session.close()
+        self.close()
 
     def commit(self):
         """Commit the current transaction"""
@@ -492,8 +1013,14 @@ class DB:
         self.session.rollback()
 
     def close(self):
-        """Close the session"""
-        self.session.close()
+        """Release this DB - the last open one on the thread closes the shared session and returns its connection"""
+        if self._closed:
+            return
+        self._closed = True
+        info = self.session.info
+        info['db_refs'] -= 1
+        if not info['db_refs']:
+            SessionFactory.remove()
 
 
 
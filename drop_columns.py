@@ -16,22 +16,26 @@ def drop_columns():
     shutil.copy(db_path, backup_path)
     print(f"  ✓ Backup saved to {backup_path}")
     
-    conn = sqlite3.connect(db_path)
+    # Autocommit mode so the whole rebuild runs in the one explicit transaction below
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
     
+    # These pragmas can't change inside a transaction, so set them first.
+    # FK checks are skipped while rows are copied between the old and new tables,
+    # and synchronous=OFF is fine for a one-shot run with a backup on disk.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA foreign_keys=OFF")
+    
     try:
+        cursor.execute("BEGIN IMMEDIATE")
+        
         # ====================================================================
         # 1. DROP COLUMNS FROM AUTHORS TABLE
         # ====================================================================
         print("\nProcessing authors table...")
         
-        cursor.execute("PRAGMA table_info(authors)")
-        columns = cursor.fetchall()
-        keep_columns = ['id', 'name', 'needs_review']
-        
-        column_names = [col[1] for col in columns]
-        keep_indices = [i for i, name in enumerate(column_names) if name in keep_columns]
-        
+        # Keeping: id, name, needs_review
         # Create new table with only columns we want to keep
         cursor.execute("""
             CREATE TABLE authors_new (
@@ -57,13 +61,7 @@ def drop_columns():
         # ====================================================================
         print("\nProcessing quotes table...")
         
-        cursor.execute("PRAGMA table_info(quotes)")
-        columns = cursor.fetchall()
-        keep_columns = ['id', 'text', 'author_id', 'source', 'tag_list', 'needs_review']
-        
-        column_names = [col[1] for col in columns]
-        keep_indices = [i for i, name in enumerate(column_names) if name in keep_columns]
-        
+        # Keeping: id, text, author_id, source, tag_list, needs_review
         cursor.execute("""
             CREATE TABLE quotes_new (
                 id INTEGER PRIMARY KEY,
@@ -90,13 +88,7 @@ def drop_columns():
         # ====================================================================
         print("\nProcessing users table...")
         
-        cursor.execute("PRAGMA table_info(users)")
-        columns = cursor.fetchall()
-        keep_columns = ['id', 'name', 'email', 'password_hash', 'created_at', 'last_login', 'needs_review']
-        
-        column_names = [col[1] for col in columns]
-        keep_indices = [i for i, name in enumerate(column_names) if name in keep_columns]
-        
+        # Keeping: id, name, email, password_hash, created_at, last_login, needs_review
         cursor.execute("""
             CREATE TABLE users_new (
                 id INTEGER PRIMARY KEY,
@@ -123,13 +115,7 @@ def drop_columns():
         # ====================================================================
         print("\nProcessing tags table...")
         
-        cursor.execute("PRAGMA table_info(tags)")
-        columns = cursor.fetchall()
-        keep_columns = ['id', 'name', 'created_at', 'needs_review']
-        
-        column_names = [col[1] for col in columns]
-        keep_indices = [i for i, name in enumerate(column_names) if name in keep_columns]
-        
+        # Keeping: id, name, created_at, needs_review
         cursor.execute("""
             CREATE TABLE tags_new (
                 id INTEGER PRIMARY KEY,
@@ -149,7 +135,8 @@ def drop_columns():
         print("  ✓ Dropped: quote_id, author_id, user_id")
         
         # Commit changes
-        conn.commit()
+        cursor.execute("COMMIT")
+        cursor.execute("PRAGMA foreign_keys=ON")
         
         print("\n" + "=" * 60)
         print("✅ All columns dropped successfully!")
@@ -1,45 +1,53 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Table, ForeignKey, Boolean, DateTime, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Text, Table, ForeignKey, Boolean, DateTime, JSON, Index, DDL, event, table, column, text, func
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker, Mapped, mapped_column, DeclarativeBase
+from sqlalchemy.orm import Session as OrmSession, relationship, sessionmaker, scoped_session, Mapped, mapped_column, DeclarativeBase
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from typing import Optional, List, Union
 import json
+import os
+import threading
 
 Base = declarative_base()
 
+# Set Q_RAISELOAD=1 to make unplanned lazy loads raise instead of silently querying.
+# The large collections below then have to be loaded explicitly with selectinload().
+RAISELOAD = bool(os.environ.get('Q_RAISELOAD'))
+COLLECTION_LAZY = 'raise_on_sql' if RAISELOAD else 'select'
+
 # Many-to-many relationship table for quotes and categories
 quote_categories = Table('quote_categories', Base.metadata,
-    Column('quote_id', Integer, ForeignKey('quotes.id')),
-    Column('category_id', Integer, ForeignKey('categories.id'))
+    Column('quote_id', Integer, ForeignKey('quotes.id'), index=True),
+    Column('category_id', Integer, ForeignKey('categories.id'), index=True)
 )
 
 # Many-to-many relationship table for users and quotes
 user_quotes = Table('user_quotes', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('quote_id', Integer, ForeignKey('quotes.id')),
+    Column('user_id', Integer, ForeignKey('users.id'), index=True),
+    Column('quote_id', Integer, ForeignKey('quotes.id'), index=True),
 )
 
 # Many-to-many relationship table for users and authors
 user_authors = Table('user_authors', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('author_id', Integer, ForeignKey('authors.id')),
+    Column('user_id', Integer, ForeignKey('users.id'), index=True),
+    Column('author_id', Integer, ForeignKey('authors.id'), index=True),
 )
 
 # Many-to-many relationship tables for tags
 quote_tags = Table('quote_tags', Base.metadata,
-    Column('quote_id', Integer, ForeignKey('quotes.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id')),
+    Column('quote_id', Integer, ForeignKey('quotes.id'), index=True),
+    Column('tag_id', Integer, ForeignKey('tags.id'), index=True),
 )
 
 author_tags = Table('author_tags', Base.metadata,
-    Column('author_id', Integer, ForeignKey('authors.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id')),
+    Column('author_id', Integer, ForeignKey('authors.id'), index=True),
+    Column('tag_id', Integer, ForeignKey('tags.id'), index=True),
 )
 
 user_tags = Table('user_tags', Base.metadata,
-    Column('user_id', Integer, ForeignKey('users.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id')),
+    Column('user_id', Integer, ForeignKey('users.id'), index=True),
+    Column('tag_id', Integer, ForeignKey('tags.id'), index=True),
 )
 
 class CountMixin:
@@ -64,18 +72,23 @@ class User(Base, CountMixin):
     last_login: Mapped[Optional[datetime]] = mapped_column(DateTime)
     needs_review: Mapped[bool] = mapped_column(Boolean, default=True)
 
-    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=user_quotes, back_populates='users', cascade='all, delete')
-    authors: Mapped[List['Author']] = relationship('Author', secondary=user_authors, back_populates='users', cascade='all, delete')
+    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=user_quotes, back_populates='users', cascade='all, delete', lazy=COLLECTION_LAZY)
+    authors: Mapped[List['Author']] = relationship('Author', secondary=user_authors, back_populates='users', cascade='all, delete', lazy=COLLECTION_LAZY)
     tags: Mapped[List['Tag']] = relationship('Tag', secondary=user_tags, back_populates='users', cascade='all, delete')
 
     def __repr__(self) -> str:
         return f"<User(id={self.id}, name='{self.name}')>"
 
-    def set_password(self, password: str) -> None:
-        """Hash and set the user's password"""
+    @staticmethod
+    def hash_password(password: str) -> str:
+        """Validate and hash a password without touching a User instance"""
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters")
-        self.password_hash = generate_password_hash(password)
+        return generate_password_hash(password)
+
+    def set_password(self, password: str) -> None:
+        """Hash and set the user's password"""
+        self.password_hash = User.hash_password(password)
     
     def check_password(self, password: str) -> bool:
         """Check if the provided password matches the hash"""
@@ -90,7 +103,7 @@ class Author(Base, CountMixin):
     name: Mapped[str] = mapped_column(String(200), unique=True, nullable=False)
     needs_review: Mapped[bool] = mapped_column(Boolean, default=True)
 
-    quotes: Mapped[List['Quote']] = relationship('Quote', back_populates='author')
+    quotes: Mapped[List['Quote']] = relationship('Quote', back_populates='author', lazy=COLLECTION_LAZY)
     users: Mapped[List['User']] = relationship('User', secondary=user_authors, back_populates='authors')
     tags: Mapped[List['Tag']] = relationship('Tag', secondary=author_tags, back_populates='authors')
 
@@ -105,7 +118,7 @@ class Category(Base, CountMixin):
     name: Mapped[str] = mapped_column(String(50), unique=True, nullable=False)
     keywords: Mapped[Optional[str]] = mapped_column(Text)  # Stores JSON array
 
-    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=quote_categories, back_populates='categories', cascade='all, delete')
+    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=quote_categories, back_populates='categories', cascade='all, delete', lazy=COLLECTION_LAZY)
 
     def __repr__(self) -> str:
         return f"<Category(id={self.id}, name='{self.name}')>"
@@ -129,7 +142,7 @@ class Quote(Base, CountMixin):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    author_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('authors.id'), nullable=True)
+    author_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('authors.id'), nullable=True, index=True)
     source: Mapped[Optional[str]] = mapped_column(String(300))
     needs_review: Mapped[bool] = mapped_column(Boolean, default=True)
 
@@ -157,7 +170,7 @@ class Tag(Base, CountMixin):
     needs_review: Mapped[bool] = mapped_column(Boolean, default=True)
     
     # Polymorphic relationships - tag can be applied to many of each type
-    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=quote_tags, back_populates='tags', cascade='all, delete')
+    quotes: Mapped[List['Quote']] = relationship('Quote', secondary=quote_tags, back_populates='tags', cascade='all, delete', lazy=COLLECTION_LAZY)
     authors: Mapped[List['Author']] = relationship('Author', secondary=author_tags, back_populates='tags', cascade='all, delete')
     users: Mapped[List['User']] = relationship('User', secondary=user_tags, back_populates='tags', cascade='all, delete')
 
@@ -165,8 +178,152 @@ class Tag(Base, CountMixin):
         return f"<Tag(id={self.id}, name='{self.name}')>"
 
 
+# Trigram GIN indexes let ILIKE '%q%' searches use an index on PostgreSQL.
+# They are skipped on SQLite, which has no equivalent index type.
+event.listen(Base.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+for _column in (Quote.text, Author.name, Tag.name, Category.name):
+    Index(f'ix_{_column.class_.__tablename__}_{_column.key}_trgm', _column,
+          postgresql_using='gin', postgresql_ops={_column.key: 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+
+# lower(name) indexes for the validator's case-insensitive duplicate checks - equality
+# on lower() is an index seek where ILIKE scans. Not unique: older databases may
+# already hold names differing only in case.
+for _column in (Author.name, Tag.name, Category.name):
+    Index(f'ix_{_column.class_.__tablename__}_{_column.key}_lower', func.lower(_column))
+
+# Stemmed word index for QuoteRepository.search_words() on PostgreSQL
+QUOTE_TSVECTOR = func.to_tsvector(text("'english'"), Quote.text)
+Index('ix_quotes_text_tsv', QUOTE_TSVECTOR, postgresql_using='gin').ddl_if(dialect='postgresql')
+
+
+def create_missing_indexes(bind) -> None:
+    """create_all() only indexes tables it creates - add indexes declared later to existing tables"""
+    checkfirst, existing = True, set()
+    if bind.dialect.name == 'sqlite':
+        # SQLite reflection skips expression indexes, so checkfirst can't see them - ask sqlite_master
+        with bind.connect() as conn:
+            existing = set(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'")))
+        checkfirst = False
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind, checkfirst=checkfirst)
+
+
+# SQLite FTS5 trigram tables shadowing the searched columns. The trigram tokenizer
+# serves the same case-insensitive '%q%' LIKE patterns as ilike() from an index.
+SEARCH_TABLES = {
+    _column.class_: table(f'{_column.class_.__tablename__}_fts', column('rowid'), column(_column.key))
+    for _column in (Quote.text, Author.name, Tag.name, Category.name)
+}
+
+# Engines whose search tables were created; the others search with plain LIKE
+_search_engines = set()
+
+
+def search_tables_ready(bind) -> bool:
+    """Whether the FTS5 search tables exist and are kept in sync on this engine"""
+    return getattr(bind, 'engine', bind) in _search_engines
+
+
+def _trigram_supported(bind) -> bool:
+    """Probe for FTS5 with the trigram tokenizer (SQLite 3.34+ built with FTS5)"""
+    try:
+        with bind.connect() as conn:
+            conn.execute(text("CREATE VIRTUAL TABLE temp.trigram_probe USING fts5(x, tokenize='trigram')"))
+            conn.execute(text("DROP TABLE temp.trigram_probe"))
+        return True
+    except OperationalError:
+        return False
+
+
+def create_search_tables(bind) -> None:
+    """Create the FTS5 search tables and the triggers keeping them in sync (SQLite only)"""
+    if bind.dialect.name != 'sqlite' or not _trigram_supported(bind):
+        return
+    with bind.begin() as conn:
+        for model, fts in SEARCH_TABLES.items():
+            source, col = model.__tablename__, list(fts.c)[1].name
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': fts.name}).first()
+            conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts.name} USING fts5({col}, content='{source}', "
+                              f"content_rowid='id', tokenize='trigram')"))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts.name}_ai AFTER INSERT ON {source} BEGIN "
+                              f"INSERT INTO {fts.name}(rowid, {col}) VALUES (new.id, new.{col}); END"))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts.name}_ad AFTER DELETE ON {source} BEGIN "
+                              f"INSERT INTO {fts.name}({fts.name}, rowid, {col}) VALUES ('delete', old.id, old.{col}); END"))
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {fts.name}_au AFTER UPDATE OF {col} ON {source} BEGIN "
+                              f"INSERT INTO {fts.name}({fts.name}, rowid, {col}) VALUES ('delete', old.id, old.{col}); "
+                              f"INSERT INTO {fts.name}(rowid, {col}) VALUES (new.id, new.{col}); END"))
+            if not exists:
+                # Index rows that were already there before the search table was added
+                conn.execute(text(f"INSERT INTO {fts.name}({fts.name}) VALUES ('rebuild')"))
+    _search_engines.add(bind.engine)
+
 
 # Database setup
-engine = create_engine('sqlite:///quotes.db', echo=False)
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+# Q_POOL / Q_OVERFLOW size the connection pool for concurrent load
+engine = create_engine('sqlite:///quotes.db', echo=False, insertmanyvalues_page_size=10_000,
+                       pool_size=int(os.environ.get('Q_POOL', 20)),
+                       max_overflow=int(os.environ.get('Q_OVERFLOW', 40)),
+                       pool_pre_ping=True, pool_recycle=1800, query_cache_size=1200)
+
+
+@event.listens_for(engine, 'connect')
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """SQLite pragmas are per connection, so they are set on every new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')        # readers don't block on a writer
+    cursor.execute('PRAGMA synchronous=NORMAL')      # safe with WAL, fsyncs only at checkpoints
+    cursor.execute('PRAGMA cache_size=-65536')       # 64 MB page cache
+    cursor.execute('PRAGMA mmap_size=268435456')     # 256 MB memory-mapped reads
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+    # pysqlite only opens a transaction before DML, so a SAVEPOINT issued first would
+    # start (and its RELEASE end) a transaction of its own - BEGIN is emitted below instead
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, 'begin')
+def _sqlite_begin(conn) -> None:
+    """Start every transaction explicitly, so SAVEPOINTs (DB.transaction() nesting) nest inside it"""
+    conn.exec_driver_sql('BEGIN')
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def init_db(bind=None) -> None:
+    """Create missing tables, indexes and search tables - once per process, on first use
+
+    Not run at import: worker processes import this module too (e.g. to unpickle
+    User.hash_password) and must not touch the schema. Sessions from Session /
+    SessionFactory call it when they are created, so callers never need to.
+    """
+    global _schema_ready
+    if _schema_ready and bind is None:
+        return
+    with _schema_lock:
+        if _schema_ready and bind is None:
+            return
+        target = engine if bind is None else bind
+        Base.metadata.create_all(target)
+        create_missing_indexes(target)
+        create_search_tables(target)
+        if bind is None:
+            _schema_ready = True
+
+
+class _SchemaSession(OrmSession):
+    """Session that makes sure the schema exists before its first use"""
+
+    def __init__(self, *args, **kwargs):
+        init_db()
+        super().__init__(*args, **kwargs)
+
+
+Session = sessionmaker(bind=engine, class_=_SchemaSession)
+
+# Thread-local session shared by every DB() - and every handler or Validator
+# created without a session - on the same thread
+SessionFactory = scoped_session(Session)
\ No newline at end of file
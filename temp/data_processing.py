@@ -3,14 +3,40 @@ Advanced Patterns: Data Processing, Concurrency, and API/Web
 For handling large datasets efficiently and building scalable APIs
 """
 
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session, sessionmaker
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
-from threading import Lock, Thread
+from threading import Lock, Thread, local
 from queue import Queue
+from heapq import heappush, heappop
+try:
+    from queue import ShutDown  # Python 3.13+
+except ImportError:
+    class ShutDown(Exception):
+        """Stand-in that is never raised - older Queues have no shutdown(), so sentinels stop consumers"""
 import time
 from datetime import datetime
-from typing import List, Dict, Callable
+from typing import List, Dict, Callable, Iterable
+from itertools import islice, groupby
+from functools import wraps
 import json
+import logging
+
+from models import Quote
+
+_log = logging.getLogger(__name__)
+
+# Worker pools for parallel pipeline steps, kept between calls - starting processes is the expensive part
+_process_pools: Dict[tuple, ProcessPoolExecutor] = {}
+
+
+def _process_pool(workers, initializer=None) -> ProcessPoolExecutor:
+    """Shared ProcessPoolExecutor for this worker count and initializer"""
+    key = (workers, initializer)
+    pool = _process_pools.get(key)
+    if pool is None:
+        pool = _process_pools[key] = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+    return pool
 
 
 # ============================================================================
@@ -29,24 +55,62 @@ class ProcessingPipeline:
     def __init__(self):
         self.steps = []
     
-    def add_step(self, name: str, func: Callable):
-        """Add a processing step"""
-        self.steps.append((name, func))
+    def add_step(self, name: str, func: Callable, per_item: bool = False):
+        """Add a processing step
+        
+        per_item steps take and return a single element; runs of them are fused
+        into one pass over the data instead of one list per step.
+        """
+        self.steps.append((name, func, per_item))
+        return self
+    
+    def add_parallel_step(self, name: str, func: Callable, workers: int = None,
+                          chunk: int = 1000, initializer: Callable = None):
+        """Add a CPU-bound per-item step that runs in worker processes
+        
+        Items are sent to the workers chunk at a time and results come back in
+        input order. func and the items must be picklable (module-level
+        functions); initializer runs once per worker, e.g. to load a model.
+        workers=1 runs the step in this process.
+        """
+        def parallel(data):
+            if workers == 1:
+                if initializer:
+                    initializer()
+                return list(map(func, data))
+            return list(_process_pool(workers, initializer).map(func, data, chunksize=chunk))
+        self.steps.append((name, parallel, False))
         return self
     
+    def _stages(self):
+        """Yield (name, func) stages - each run of consecutive per_item steps becomes one map"""
+        for per_item, group in groupby(self.steps, key=lambda step: step[2]):
+            group = list(group)
+            if not per_item:
+                yield from ((name, func) for name, func, _ in group)
+                continue
+            
+            funcs = [func for _, func, _ in group]
+            def fused(item, funcs=funcs):
+                for func in funcs:
+                    item = func(item)
+                return item
+            yield ' + '.join(name for name, _, _ in group), lambda data, fused=fused: list(map(fused, data))
+    
     def process(self, data):
-        """Execute all steps in order"""
+        """Execute all steps in order - per-step timings are logged at DEBUG"""
         result = data
-        for step_name, func in self.steps:
-            print(f"Executing: {step_name}")
+        for step_name, func in self._stages():
+            start = time.perf_counter_ns()
             result = func(result)
+            _log.debug("%s took %.3f ms", step_name, (time.perf_counter_ns() - start) / 1e6)
         return result
 
 
 # Example usage:
 # pipeline = ProcessingPipeline()
 # pipeline.add_step("Load quotes", load_quotes)
-#         .add_step("Clean text", clean_quote_text)
+#         .add_step("Clean text", clean_quote_text, per_item=True)
 #         .add_step("Extract tags", extract_tags)
 #         .add_step("Validate", validate_quotes)
 #         .add_step("Save to DB", save_quotes)
@@ -72,23 +136,38 @@ class BatchProcessor:
         self.on_error = on_error
         self.processed = 0
     
-    def process_query_results(self, query, processor_func: Callable):
+    def process_query_results(self, query, processor_func: Callable, order_column=None):
         """
         Process query results in batches
         
+        Pages by key (WHERE key > last key seen) instead of OFFSET, so each batch
+        costs the same however far in it is, and rows the processor changes out
+        of the query's filter can't shift later pages.
+        
         Args:
             query: SQLAlchemy query object
             processor_func: Function to call on each batch
+            order_column: Unique column to page by - defaults to the entity's id
         """
-        total = query.count()
-        offset = 0
+        if order_column is None:
+            order_column = query.column_descriptions[0]['entity'].id
         
-        while offset < total:
-            batch = query.offset(offset).limit(self.batch_size).all()
+        # Only count when something reports progress - it's a full scan of its own
+        total = query.count() if self.on_batch_complete else None
+        last_key = None
+        
+        while True:
+            page = query.order_by(None).order_by(order_column)
+            if last_key is not None:
+                page = page.filter(order_column > last_key)
+            batch = page.limit(self.batch_size).all()
             
             if not batch:
                 break
             
+            # Read before processing - a rollback below would expire the row
+            last_key = getattr(batch[-1], order_column.key)
+            
             try:
                 processor_func(batch)
                 self.processed += len(batch)
@@ -108,15 +187,20 @@ class BatchProcessor:
                 if self.on_error:
                     self.on_error(e, batch)
             
-            offset += self.batch_size
+            if len(batch) < self.batch_size:
+                break
     
-    def process_list(self, items: List, processor_func: Callable):
-        """Process a list in batches"""
-        total = len(items)
+    def process_list(self, items: Iterable, processor_func: Callable):
+        """
+        Process a list - or any iterable, e.g. query.yield_per(n) - in batches
         
-        for i in range(0, total, self.batch_size):
-            batch = items[i:i + self.batch_size]
-            
+        Only one batch is held at a time, so a streamed query never has to be
+        materialized. total/progress are None when the iterable has no len().
+        """
+        total = len(items) if hasattr(items, '__len__') else None
+        items = iter(items)
+        
+        while batch := list(islice(items, self.batch_size)):
             try:
                 processor_func(batch)
                 self.processed += len(batch)
@@ -125,7 +209,7 @@ class BatchProcessor:
                     self.on_batch_complete({
                         'processed': self.processed,
                         'total': total,
-                        'progress': (self.processed / total) * 100,
+                        'progress': (self.processed / total) * 100 if total else None,
                         'batch_size': len(batch)
                     })
             
@@ -144,6 +228,9 @@ class BatchProcessor:
 #
 # processor = BatchProcessor(session, batch_size=500, on_batch_complete=on_batch_done)
 # processor.process_query_results(Quote.query, process_batch)
+#
+# # Read-only pass over a streamed query - one batch in memory at a time
+# processor.process_list(session.query(Quote).yield_per(500), process_batch)
 
 
 # ============================================================================
@@ -157,6 +244,9 @@ class ThreadPoolDataProcessor:
     (database queries, API calls, file I/O)
     
     NOT for CPU-bound work (use ProcessPoolDataProcessor instead)
+    
+    session_factory should be bound to a pooled engine with pool_size >= max_workers
+    (models.Session is - see Q_POOL) so every worker gets a warm connection.
     """
     
     def __init__(self, session_factory: sessionmaker, max_workers: int = 5):
@@ -167,28 +257,66 @@ class ThreadPoolDataProcessor:
                                process_func: Callable) -> List:
         """
         Process quotes in parallel using thread pool
-        Each thread gets its own database session
+        Each thread gets its own database session, reused for every id it handles
         """
         results = []
+        per_thread = local()
+        opened = []
+        
+        def thread_session():
+            session = getattr(per_thread, 'session', None)
+            if session is None:
+                session = per_thread.session = self.session_factory()
+                opened.append(session)
+            return session
         
         def process_with_session(quote_id):
-            session = self.session_factory()
+            session = thread_session()
             try:
-                from models import Quote
-                quote = session.query(Quote).filter(Quote.id == quote_id).first()
+                quote = session.get(Quote, quote_id)
                 if quote:
                     return process_func(quote, session)
-            finally:
+            except Exception:
+                session.rollback()  # leave the session usable for this thread's next id
+                raise
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(process_with_session, qid) 
+                          for qid in quote_ids]
+                
+                for future in futures:
+                    result = future.result()
+                    if result:
+                        results.append(result)
+        finally:
+            for session in opened:
                 session.close()
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = [executor.submit(process_with_session, qid) 
-                      for qid in quote_ids]
-            
-            for future in futures:
-                result = future.result()
-                if result:
-                    results.append(result)
+        return results
+    
+    def process_quotes_batched(self, quote_ids: List[int], 
+                               process_func: Callable, chunk: int = 500) -> List:
+        """
+        Load quotes with one WHERE id IN (...) query per chunk, then run
+        process_func(quote) over them in the thread pool
+        
+        For process_func doing external I/O (APIs, files) rather than DB work:
+        it gets no session, and shouldn't touch unloaded relationships since the
+        quotes share one session across threads. Use process_quotes_parallel
+        when each call needs its own session.
+        """
+        results = []
+        quote_ids = iter(quote_ids)
+        session = self.session_factory()
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while ids := list(islice(quote_ids, chunk)):
+                    quotes = session.query(Quote).filter(Quote.id.in_(ids)).all()
+                    results.extend(result for result in executor.map(process_func, quotes) if result)
+        finally:
+            session.close()
         
         return results
 
@@ -202,6 +330,9 @@ class ThreadPoolDataProcessor:
 #     return {'id': quote.id, 'text': quote.text}
 #
 # results = processor.process_quotes_parallel(quote_ids, fetch_and_enrich)
+#
+# # Same ids, one query per 500 - process_func only gets the quote
+# results = processor.process_quotes_batched(quote_ids, lambda quote: {'id': quote.id, 'text': quote.text})
 
 
 # 2. PRODUCER-CONSUMER PATTERN
@@ -211,38 +342,51 @@ class ProducerConsumer:
     Producer adds data to queue, consumers process it
     """
     
-    def __init__(self, num_consumers: int = 3):
+    def __init__(self, num_consumers: int = 3, batch_size: int = 64):
         self.queue = Queue()
         self.num_consumers = num_consumers
+        self.batch_size = batch_size
         self.running = False
     
     def producer(self, data_source: Callable):
-        """Generate data and add to queue"""
-        for item in data_source():
-            self.queue.put(item)
+        """Generate data and add to queue - in chunks, so the queue lock is taken once per batch_size items"""
+        items = iter(data_source())
+        while batch := list(islice(items, self.batch_size)):
+            self.queue.put(batch)
         
-        # Signal consumers to stop
-        for _ in range(self.num_consumers):
-            self.queue.put(None)
+        # Signal consumers to stop - shutdown() wakes them all at once once the queue
+        # drains (3.13+), otherwise one sentinel per consumer
+        if hasattr(self.queue, 'shutdown'):
+            self.queue.shutdown()
+        else:
+            for _ in range(self.num_consumers):
+                self.queue.put(None)
     
     def consumer(self, process_func: Callable, consumer_id: int):
         """Process items from queue"""
         while True:
-            item = self.queue.get()
+            try:
+                batch = self.queue.get()
+            except ShutDown:  # Queue shut down and drained
+                break
             
-            if item is None:  # Stop signal
+            if batch is None:  # Stop signal
+                self.queue.task_done()  # or run()'s queue.join() waits on it forever
                 break
             
             try:
-                process_func(item, consumer_id)
-            except Exception as e:
-                print(f"Consumer {consumer_id} error: {e}")
+                for item in batch:
+                    try:
+                        process_func(item, consumer_id)
+                    except Exception as e:
+                        print(f"Consumer {consumer_id} error: {e}")
             finally:
                 self.queue.task_done()
     
     def run(self, data_source: Callable, process_func: Callable):
         """Start producer and consumers"""
         self.running = True
+        self.queue = Queue()  # fresh each run - the last one may have been shut down
         
         # Start consumer threads
         consumer_threads = [
@@ -291,20 +435,22 @@ class RateLimiter:
     def __init__(self, max_per_second: int = 10):
         self.max_per_second = max_per_second
         self.min_interval = 1.0 / max_per_second
-        self.last_call = 0
+        self.next_allowed = 0.0
         self.lock = Lock()
     
     def wait(self):
-        """Wait if necessary to maintain rate limit"""
+        """Wait if necessary to maintain rate limit
+        
+        Each caller reserves the next free slot under the lock and sleeps outside
+        it, so waiting threads don't queue up behind one another's sleep.
+        """
         with self.lock:
-            now = time.time()
-            time_since_last = now - self.last_call
-            
-            if time_since_last < self.min_interval:
-                wait_time = self.min_interval - time_since_last
-                time.sleep(wait_time)
-            
-            self.last_call = time.time()
+            now = time.monotonic()  # unaffected by wall-clock jumps
+            slot = max(now, self.next_allowed)
+            self.next_allowed = slot + self.min_interval
+        
+        if slot > now:
+            time.sleep(slot - now)
 
 
 # Usage:
@@ -327,6 +473,7 @@ class APIResponse:
         self.data = data
         self.error = error
         self.status_code = status_code
+        self.timestamp = datetime.utcnow().isoformat()  # when the response was built - not per serialization
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for JSON response"""
@@ -334,12 +481,12 @@ class APIResponse:
             'success': self.error is None,
             'data': self.data,
             'error': self.error,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': self.timestamp
         }
     
     def to_json(self) -> str:
-        """Convert to JSON string"""
-        return json.dumps(self.to_dict())
+        """Convert to JSON string - compact separators, no padding whitespace"""
+        return json.dumps(self.to_dict(), separators=(',', ':'))
 
 
 # Usage:
@@ -361,21 +508,18 @@ class QuoteService:
     
     def get_quote_by_id(self, quote_id: int):
         """Get a single quote"""
-        from models import Quote
         return self.session.query(Quote).filter(
             Quote.id == quote_id
         ).first()
     
     def search_quotes(self, query: str, limit: int = 50):
         """Search quotes by text"""
-        from models import Quote
         return self.session.query(Quote).filter(
             Quote.text.ilike(f"%{query}%")
         ).limit(limit).all()
     
     def create_quote(self, text: str, author_id: int) -> 'Quote':
         """Create a new quote"""
-        from models import Quote
         quote = Quote(text=text, author_id=author_id)
         self.session.add(quote)
         self.session.commit()
@@ -383,7 +527,6 @@ class QuoteService:
     
     def update_quote(self, quote_id: int, **kwargs) -> 'Quote':
         """Update a quote"""
-        from models import Quote
         quote = self.get_quote_by_id(quote_id)
         if not quote:
             raise ValueError("Quote not found")
@@ -395,9 +538,24 @@ class QuoteService:
         self.session.commit()
         return quote
     
+    def create_quotes(self, items: List[Dict]) -> int:
+        """Create many quotes with one executemany INSERT and one commit"""
+        if not items:
+            return 0
+        self.session.execute(insert(Quote), items)
+        self.session.commit()
+        return len(items)
+    
+    def update_quotes(self, items: List[Dict]) -> int:
+        """Update many quotes by primary key - each dict needs 'id' - in one executemany and one commit"""
+        if not items:
+            return 0
+        self.session.execute(update(Quote), items)
+        self.session.commit()
+        return len(items)
+    
     def delete_quote(self, quote_id: int) -> bool:
         """Delete a quote"""
-        from models import Quote
         quote = self.get_quote_by_id(quote_id)
         if not quote:
             return False
@@ -429,60 +587,103 @@ class QuoteService:
 class DIContainer:
     """
     Manage dependencies - makes testing easier
+    Keys can be names or, cheaper to hash and typo-proof, the service class itself
     """
     
     def __init__(self):
         self.services = {}
+        self.factories = {}
     
-    def register(self, name: str, service):
+    def register(self, key, service):
         """Register a service"""
-        self.services[name] = service
+        self.services[key] = service
+    
+    def register_factory(self, key, factory: Callable):
+        """Register a zero-argument factory - built on the first get() and cached"""
+        self.factories[key] = factory
     
-    def get(self, name: str):
+    def get(self, key):
         """Get a service"""
-        return self.services.get(name)
+        service = self.services.get(key)
+        if service is None and key in self.factories:
+            service = self.services[key] = self.factories.pop(key)()
+        return service
 
 
 # Usage:
 # container = DIContainer()
-# container.register('session', Session())
-# container.register('quote_service', QuoteService(container.get('session')))
+# container.register(Session, Session())
+# container.register_factory(QuoteService, lambda: QuoteService(container.get(Session)))
 #
 # # In endpoints:
-# quote_service = container.get('quote_service')
+# quote_service = container.get(QuoteService)
 # quote = quote_service.get_quote_by_id(1)
 
 
 # 4. CACHING PATTERN
+_MISSING = object()  # lets None results be cached
+
+
 class CacheLayer:
     """
     Simple in-memory cache for frequently accessed data
     """
     
-    def __init__(self, ttl_seconds: int = 300):
-        self.cache = {}
+    def __init__(self, ttl_seconds: int = 300, maxsize: int = 10_000):
+        self.cache = {}  # key -> (value, expires_at)
         self.ttl = ttl_seconds
-    
-    def get(self, key: str):
-        """Get cached value if not expired"""
-        if key not in self.cache:
-            return None
-        
-        value, timestamp = self.cache[key]
+        self.maxsize = maxsize
+        self._expiries = []  # min-heap of (expires_at, key)
+        self._lock = Lock()
+    
+    def get(self, key: str, default=None):
+        """Get cached value if not expired - expired entries are left for set() to evict"""
+        with self._lock:
+            entry = self.cache.get(key)
         
-        if time.time() - timestamp > self.ttl:
-            del self.cache[key]
-            return None
+        if entry is None or time.monotonic() >= entry[1]:
+            return default
         
-        return value
+        return entry[0]
     
     def set(self, key: str, value):
-        """Cache a value"""
-        self.cache[key] = (value, time.time())
+        """Cache a value, evicting every entry that has expired since the last set"""
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        
+        with self._lock:
+            self.cache[key] = (value, expires_at)
+            heappush(self._expiries, (expires_at, key))
+            
+            while self._expiries and self._expiries[0][0] <= now:
+                old_expiry, old_key = heappop(self._expiries)
+                entry = self.cache.get(old_key)
+                if entry is not None and entry[1] == old_expiry:  # skip keys set again since
+                    del self.cache[old_key]
+            
+            # Still full of live entries - drop the oldest inserted
+            while len(self.cache) > self.maxsize:
+                del self.cache[next(iter(self.cache))]
+    
+    def memoize(self, key_func: Callable):
+        """Decorator caching a function's results under key_func(*args, **kwargs)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                key = key_func(*args, **kwargs)
+                value = self.get(key, _MISSING)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    self.set(key, value)
+                return value
+            return wrapper
+        return decorator
     
     def clear(self):
         """Clear all cache"""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self._expiries.clear()
 
 
 # Usage:
@@ -502,6 +703,11 @@ class CacheLayer:
 #     cache.set(f'quote_{quote_id}', quote.to_dict())
 #     
 #     return quote.to_dict()
+#
+# # Or let the cache do the get/set:
+# @cache.memoize(lambda quote_id: f'quote_{quote_id}')
+# def load_quote(quote_id):
+#     return service.get_quote_by_id(quote_id).to_dict()
 
 
 # 5. MIDDLEWARE PATTERN
@@ -510,12 +716,14 @@ class RequestLogger:
     
     @staticmethod
     def log_request(func):
+        @wraps(func)  # keeps __name__ - Flask registers routes by it
         def wrapper(*args, **kwargs):
-            start = time.time()
-            result = func(*args, **kwargs)
-            duration = time.time() - start
-            print(f"Request took {duration:.2f}s")
-            return result
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Formatted only when DEBUG is enabled
+                _log.debug("%s took %.3f ms", func.__name__, (time.perf_counter_ns() - start) / 1e6)
         return wrapper
 
 
@@ -524,6 +732,7 @@ class ErrorHandler:
     
     @staticmethod
     def handle_errors(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
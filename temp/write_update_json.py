@@ -1,4 +1,5 @@
 import json
+import os
 
 
 ## Write
@@ -51,4 +52,36 @@ def append_to_json(filename, new_data):
 
 # Usage:
 append_to_json('data.json', [{"key": "value"}])
-append_to_json('data.json', {"key": "another"})
\ No newline at end of file
+append_to_json('data.json', {"key": "another"})
+
+
+## Append-only (NDJSON)
+
+def append_ndjson(filename, new_data, sync=False):
+    """Append dict objects to an NDJSON file (one object per line) - O(1) per append, nothing is re-read"""
+    if isinstance(new_data, dict):
+        new_data = [new_data]
+    
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.writelines(json.dumps(item, separators=(',', ':')) + '\n' for item in new_data)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+def read_ndjson(filename):
+    """Yield the objects in an NDJSON file one line at a time"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def migrate_json_to_ndjson(json_filename, ndjson_filename):
+    """One-time conversion of a JSON array file written by append_to_json"""
+    with open(json_filename, 'r') as f:
+        append_ndjson(ndjson_filename, json.load(f))
+
+# Usage:
+# migrate_json_to_ndjson('data.json', 'data.ndjson')
+# append_ndjson('data.ndjson', {"key": "another"})
+# for item in read_ndjson('data.ndjson'):
+#     print(item)
\ No newline at end of file
@@ -6,8 +6,10 @@ Different architectural approaches to data access and query design
 from sqlalchemy.orm import Session
 from typing import List, Optional, Generic, TypeVar, Protocol
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
-from models import Quote, Author, Tag, Category
+from models import Quote, Author, Tag, Category, SessionFactory
+from db import quote_search_filter
 
 T = TypeVar('T')
 
@@ -28,7 +30,7 @@ Repository: "Give me all quotes with tags"
 DAO: "Execute this specific SQL optimized for this use case"
 """
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QuoteDTO:
     """Data Transfer Object - what the DAO returns"""
     id: int
@@ -47,50 +49,65 @@ class QuoteDAO:
     def __init__(self, session: Session):
         self.session = session
     
+    def _select_dtos(self):
+        """Columns a QuoteDTO is built from - plain values, no ORM objects"""
+        from sqlalchemy import select
+        return select(Quote.id, Quote.text, Author.name, Quote.needs_review).outerjoin(Quote.author)
+    
+    def _tag_names(self, quote_ids: List[int]) -> dict:
+        """Tag names for many quotes in one query - {quote_id: [name, ...]}"""
+        from sqlalchemy import select
+        from models import quote_tags
+        
+        names = {}
+        stmt = (select(quote_tags.c.quote_id, Tag.name)
+                .join(Tag, Tag.id == quote_tags.c.tag_id)
+                .where(quote_tags.c.quote_id.in_(quote_ids)))
+        for quote_id, name in self.session.execute(stmt):
+            names.setdefault(quote_id, []).append(name)
+        return names
+    
+    def _to_dtos(self, rows) -> List[QuoteDTO]:
+        """Build DTOs from (id, text, author name, needs_review) rows plus one tag query"""
+        tags = self._tag_names([row[0] for row in rows]) if rows else {}
+        return [
+            QuoteDTO(id, text, author_name, tags.get(id, []), needs_review)
+            for id, text, author_name, needs_review in rows
+        ]
+    
     def fetch_quote_detail(self, quote_id: int) -> Optional[QuoteDTO]:
         """
-        Fetch quote with all details in ONE optimized query
+        Fetch quote with all details as plain rows - one for the quote, one for its tags
         Returns a DTO, not a domain object
         """
-        from sqlalchemy import select, joinedload
+        row = self.session.execute(self._select_dtos().where(Quote.id == quote_id)).one_or_none()
         
-        quote = self.session.query(Quote).options(
-            joinedload(Quote.author),
-            joinedload(Quote.tags)
-        ).filter(Quote.id == quote_id).first()
-        
-        if not quote:
+        if not row:
             return None
         
-        return QuoteDTO(
-            id=quote.id,
-            text=quote.text,
-            author_name=quote.author.name,
-            tag_names=[tag.name for tag in quote.tags],
-            needs_review=quote.needs_review
-        )
+        return self._to_dtos([row])[0]
     
     def fetch_quotes_for_display(self, page: int, per_page: int) -> tuple[List[QuoteDTO], int]:
         """
         Fetch quotes optimized for display/list pages
         Returns only what's needed for UI
         """
-        query = self.session.query(Quote).options(
-            joinedload(Quote.author)
-        )
+        from sqlalchemy import select, func
         
-        total = query.count()
-        quotes = query.offset((page - 1) * per_page).limit(per_page).all()
+        total = self.session.execute(select(func.count()).select_from(Quote)).scalar()
+        rows = self.session.execute(
+            self._select_dtos().order_by(Quote.id).offset((page - 1) * per_page).limit(per_page)
+        ).all()
         
         dtos = [
             QuoteDTO(
-                id=q.id,
-                text=q.text[:100] + "..." if len(q.text) > 100 else q.text,
-                author_name=q.author.name,
+                id=id,
+                text=text[:100] + "..." if len(text) > 100 else text,
+                author_name=author_name,
                 tag_names=[],  # Don't load tags for list view (expensive)
-                needs_review=q.needs_review
+                needs_review=needs_review
             )
-            for q in quotes
+            for id, text, author_name, needs_review in rows
         ]
         
         return dtos, total
@@ -100,40 +117,22 @@ class QuoteDAO:
         Get quotes by author - optimized specific query
         Uses raw SQL if needed for performance
         """
-        quotes = self.session.query(Quote).filter(
-            Quote.author_id == author_id
+        rows = self.session.execute(
+            self._select_dtos().where(Quote.author_id == author_id)
         ).all()
         
-        return [
-            QuoteDTO(
-                id=q.id,
-                text=q.text,
-                author_name=q.author.name,
-                tag_names=[tag.name for tag in q.tags],
-                needs_review=q.needs_review
-            )
-            for q in quotes
-        ]
+        return self._to_dtos(rows)
     
     def fetch_review_queue(self) -> List[QuoteDTO]:
         """
         Get all quotes needing review
         Optimized for admin/review interface
         """
-        quotes = self.session.query(Quote).filter(
-            Quote.needs_review == True
-        ).order_by(Quote.id).all()
+        rows = self.session.execute(
+            self._select_dtos().where(Quote.needs_review == True).order_by(Quote.id)
+        ).all()
         
-        return [
-            QuoteDTO(
-                id=q.id,
-                text=q.text,
-                author_name=q.author.name,
-                tag_names=[tag.name for tag in q.tags],
-                needs_review=True
-            )
-            for q in quotes
-        ]
+        return self._to_dtos(rows)
 
 
 # Usage:
@@ -214,9 +213,14 @@ class QuoteQuery(QueryObject[Quote]):
         return self
     
     def paginate(self, page: int, per_page: int) -> dict:
-        """Paginate results"""
-        total = self._query.count()
-        results = self._query.offset((page - 1) * per_page).limit(per_page).all()
+        """Paginate results - the total comes back with the page via COUNT(*) OVER ()"""
+        from sqlalchemy import func
+        rows = (self._query.add_columns(func.count().over().label('total'))
+                .offset((page - 1) * per_page).limit(per_page).all())
+        results = [row[0] for row in rows]
+        
+        # A page past the end has no rows to carry the total - count separately then
+        total = rows[0].total if rows else (self._query.count() if page > 1 else 0)
         
         return {
             'data': results,
@@ -275,16 +279,16 @@ class Specification(Generic[T]):
         return OrSpecification(self, other)
 
 
+@dataclass(frozen=True)
 class QuotesByAuthor(Specification[Quote]):
     """Specification: quotes by specific author"""
-    
-    def __init__(self, author_id: int):
-        self.author_id = author_id
+    author_id: int
     
     def to_predicate(self, model=Quote):
         return Quote.author_id == self.author_id
 
 
+@dataclass(frozen=True)
 class QuotesNeedingReview(Specification[Quote]):
     """Specification: quotes that need review"""
     
@@ -292,48 +296,72 @@ class QuotesNeedingReview(Specification[Quote]):
         return Quote.needs_review == True
 
 
+@dataclass(frozen=True)
 class QuotesWithTag(Specification[Quote]):
     """Specification: quotes with specific tag"""
-    
-    def __init__(self, tag_name: str):
-        self.tag_name = tag_name
+    tag_name: str
     
     def to_predicate(self, model=Quote):
         return Quote.tags.any(Tag.name == self.tag_name)
 
 
+@dataclass(frozen=True)
 class QuotesMatchingText(Specification[Quote]):
     """Specification: quotes matching text"""
-    
-    def __init__(self, text: str):
-        self.text = text
+    text: str
     
     def to_predicate(self, model=Quote):
         return Quote.text.ilike(f"%{self.text}%")
 
 
-class AndSpecification(Specification[T]):
-    """Combine two specifications with AND"""
+def _flatten(kind: type, specs) -> tuple:
+    """Children of a composite spec - nested composites of the same kind are spliced in, not nested"""
+    children = []
+    for spec in specs:
+        children.extend(spec.children if isinstance(spec, kind) else [spec])
+    return tuple(children)
+
+
+class _CompositeSpecification(Specification[T]):
+    """Base for And/Or - equal (and hashed) by kind and children, like the frozen leaf specs"""
     
-    def __init__(self, left: Specification[T], right: Specification[T]):
-        self.left = left
-        self.right = right
+    def __init__(self, *specs: Specification[T]):
+        self.children = _flatten(type(self), specs)
     
-    def to_predicate(self, model: type[T]):
-        from sqlalchemy import and_
-        return and_(self.left.to_predicate(model), self.right.to_predicate(model))
+    def __eq__(self, other):
+        return type(other) is type(self) and other.children == self.children
+    
+    def __hash__(self):
+        return hash((type(self), self.children))
 
 
-class OrSpecification(Specification[T]):
-    """Combine two specifications with OR"""
+class AndSpecification(_CompositeSpecification[T]):
+    """Combine specifications with AND - a chain of and_spec() calls builds one flat and_()"""
     
-    def __init__(self, left: Specification[T], right: Specification[T]):
-        self.left = left
-        self.right = right
+    def to_predicate(self, model: type[T]):
+        from sqlalchemy import and_, true
+        predicates = [child.to_predicate(model) for child in self.children]
+        if len(predicates) == 1:
+            return predicates[0]
+        return and_(*predicates) if predicates else true()
+
+
+class OrSpecification(_CompositeSpecification[T]):
+    """Combine specifications with OR - a chain of or_spec() calls builds one flat or_()"""
     
     def to_predicate(self, model: type[T]):
-        from sqlalchemy import or_
-        return or_(self.left.to_predicate(model), self.right.to_predicate(model))
+        from sqlalchemy import or_, false
+        predicates = [child.to_predicate(model) for child in self.children]
+        if len(predicates) == 1:
+            return predicates[0]
+        return or_(*predicates) if predicates else false()
+
+
+@lru_cache(maxsize=1024)
+def _predicate(spec: Specification, model: type):
+    """spec.to_predicate(model), built once per equal spec - leaves are frozen dataclasses and
+    composites compare by their children, so equal specs hash alike"""
+    return spec.to_predicate(model)
 
 
 class SpecificationQuery:
@@ -344,15 +372,18 @@ class SpecificationQuery:
     
     def find_all(self, spec: Specification[T], model: type[T]) -> List[T]:
         """Find all matching the specification"""
-        return self.session.query(model).filter(spec.to_predicate(model)).all()
+        from sqlalchemy import select
+        return self.session.scalars(select(model).where(_predicate(spec, model))).all()
     
     def find_one(self, spec: Specification[T], model: type[T]) -> Optional[T]:
         """Find first matching the specification"""
-        return self.session.query(model).filter(spec.to_predicate(model)).first()
+        from sqlalchemy import select
+        return self.session.scalars(select(model).where(_predicate(spec, model)).limit(1)).first()
     
     def count(self, spec: Specification[T], model: type[T]) -> int:
         """Count matching the specification"""
-        return self.session.query(model).filter(spec.to_predicate(model)).count()
+        from sqlalchemy import select, func
+        return self.session.scalar(select(func.count()).select_from(model).where(_predicate(spec, model)))
 
 
 # Usage:
@@ -413,8 +444,8 @@ class AssignTagsCommand:
 class CommandHandler:
     """Handles write operations"""
     
-    def __init__(self, session: Session):
-        self.session = session
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session if session is not None else SessionFactory()
     
     def handle_create_quote(self, cmd: CreateQuoteCommand) -> Quote:
         """Execute create quote command"""
@@ -427,9 +458,23 @@ class CommandHandler:
         self.session.commit()
         return quote
     
+    def handle_create_quotes_bulk(self, cmds: List[CreateQuoteCommand]) -> List[int]:
+        """Execute many create quote commands as one multi-row INSERT - returns the new ids in order"""
+        from sqlalchemy import insert
+        
+        if not cmds:
+            return []
+        
+        ids = self.session.execute(
+            insert(Quote).returning(Quote.id, sort_by_parameter_order=True),
+            [{'text': cmd.text, 'author_id': cmd.author_id, 'source': cmd.source} for cmd in cmds]
+        ).scalars().all()
+        self.session.commit()
+        return ids
+    
     def handle_update_quote(self, cmd: UpdateQuoteCommand) -> Quote:
         """Execute update quote command"""
-        quote = self.session.query(Quote).filter(Quote.id == cmd.quote_id).first()
+        quote = self.session.get(Quote, cmd.quote_id)
         
         if not quote:
             raise ValueError("Quote not found")
@@ -444,19 +489,22 @@ class CommandHandler:
     
     def handle_assign_tags(self, cmd: AssignTagsCommand) -> Quote:
         """Execute assign tags command"""
-        quote = self.session.query(Quote).filter(Quote.id == cmd.quote_id).first()
+        from sqlalchemy.orm import selectinload
+        
+        quote = self.session.get(Quote, cmd.quote_id, options=[selectinload(Quote.tags)])
         
         if not quote:
             raise ValueError("Quote not found")
         
-        for tag_name in cmd.tag_names:
-            tag = self.session.query(Tag).filter(Tag.name == tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                self.session.add(tag)
-            
-            if tag not in quote.tags:
-                quote.tags.append(tag)
+        # One IN query for the tags that exist, then create the rest
+        names = list(dict.fromkeys(cmd.tag_names))
+        tags = {tag.name: tag for tag in self.session.query(Tag).filter(Tag.name.in_(names))}
+        new_tags = [Tag(name=name) for name in names if name not in tags]
+        self.session.add_all(new_tags)
+        tags.update((tag.name, tag) for tag in new_tags)
+        
+        linked = set(quote.tags)  # O(1) membership instead of scanning the list per tag
+        quote.tags.extend(tags[name] for name in names if tags[name] not in linked)
         
         self.session.commit()
         return quote
@@ -471,24 +519,30 @@ class QuoteReadModel:
     text: str
     author_name: str
     tags: List[str]
-    created_at: datetime
+    created_at: Optional[datetime]  # quotes have no created_at column - always None for now
     needs_review: bool
 
 
 class QueryHandler:
-    """Handles read operations"""
+    """Handles read operations
     
-    def __init__(self, session: Session):
-        self.session = session
+    ORM reads load exactly the relationships they use and raiseload('*') the
+    rest, so touching anything else raises instead of issuing a query per row.
+    """
+    
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session if session is not None else SessionFactory()
+        self._count_cache = (None, 0)
     
     def get_quote_detail(self, quote_id: int) -> Optional[QuoteReadModel]:
         """Get a quote for detail view"""
-        from sqlalchemy.orm import joinedload
+        from sqlalchemy.orm import joinedload, selectinload, raiseload
         
-        quote = self.session.query(Quote).options(
+        quote = self.session.get(Quote, quote_id, options=[
             joinedload(Quote.author),
-            joinedload(Quote.tags)
-        ).filter(Quote.id == quote_id).first()
+            selectinload(Quote.tags),
+            raiseload('*')
+        ])
         
         if not quote:
             return None
@@ -498,45 +552,85 @@ class QueryHandler:
             text=quote.text,
             author_name=quote.author.name,
             tags=[tag.name for tag in quote.tags],
-            created_at=quote.created_at,
+            created_at=None,
             needs_review=quote.needs_review
         )
     
-    def get_quotes_paginated(self, page: int, per_page: int) -> dict:
-        """Get quotes for list view"""
-        from sqlalchemy.orm import joinedload
+    def _list_rows(self):
+        """SELECT for list view rows - plain columns ordered by id, no ORM objects"""
+        from sqlalchemy import select, func, literal
         
-        query = self.session.query(Quote).options(
-            joinedload(Quote.author)
+        return (
+            select(
+                Quote.id,
+                func.substr(Quote.text, 1, 100).label('text'),
+                Author.name.label('author_name'),
+                literal(None).label('created_at'),
+                Quote.needs_review
+            )
+            .outerjoin(Quote.author)
+            .order_by(Quote.id)
         )
+    
+    def get_quotes_paginated(self, page: int, per_page: int) -> dict:
+        """Get quotes for list view by page number
         
-        total = query.count()
-        quotes = query.offset((page - 1) * per_page).limit(per_page).all()
+        Deprecated for deep pages - OFFSET reads and discards every earlier row,
+        use get_quotes_keyset instead. No total is counted; one extra row is
+        fetched to report has_more, see get_approximate_count for a total.
+        """
+        rows = self.session.execute(
+            self._list_rows().offset((page - 1) * per_page).limit(per_page + 1)
+        ).mappings().all()
         
         return {
-            'data': [
-                QuoteReadModel(
-                    id=q.id,
-                    text=q.text[:100],
-                    author_name=q.author.name,
-                    tags=[],
-                    created_at=q.created_at,
-                    needs_review=q.needs_review
-                )
-                for q in quotes
-            ],
-            'total': total,
+            'data': [QuoteReadModel(tags=[], **row) for row in rows[:per_page]],
+            'has_more': len(rows) > per_page,
             'page': page,
             'per_page': per_page
         }
     
+    def get_approximate_count(self, max_age: float = 60.0) -> int:
+        """Number of quotes, recounted at most every max_age seconds"""
+        import time
+        from sqlalchemy import select, func
+        
+        counted_at, total = self._count_cache
+        if counted_at is None or time.monotonic() - counted_at > max_age:
+            total = self.session.execute(select(func.count()).select_from(Quote)).scalar()
+            self._count_cache = (time.monotonic(), total)
+        return total
+    
+    def get_quotes_keyset(self, after_id: Optional[int], per_page: int) -> dict:
+        """Get quotes for list view after a cursor
+        
+        Seeks straight to Quote.id > after_id on the primary key, so every page
+        costs the same however deep it is. Pass None for the first page, then
+        the returned next_cursor; next_cursor is None once there are no rows left.
+        """
+        rows = self.session.execute(
+            self._list_rows().where(Quote.id > (after_id or 0)).limit(per_page)
+        ).mappings().all()
+        
+        return {
+            'data': [QuoteReadModel(tags=[], **row) for row in rows],
+            'next_cursor': rows[-1]['id'] if rows else None,
+            'per_page': per_page
+        }
+    
     def search_quotes(self, text: str) -> List[QuoteReadModel]:
-        """Search quotes"""
-        from sqlalchemy.orm import joinedload
+        """Search quotes
+        
+        Same matching as QuoteRepository.search() - text is matched literally, and
+        served from the FTS5 trigram table on SQLite or the pg_trgm index on PostgreSQL.
+        """
+        from sqlalchemy.orm import joinedload, selectinload, raiseload
         
         quotes = self.session.query(Quote).options(
-            joinedload(Quote.author)
-        ).filter(Quote.text.ilike(f"%{text}%")).all()
+            joinedload(Quote.author),
+            selectinload(Quote.tags),
+            raiseload('*')
+        ).filter(quote_search_filter(text, self.session)).all()
         
         return [
             QuoteReadModel(
@@ -544,7 +638,7 @@ class QueryHandler:
                 text=q.text,
                 author_name=q.author.name,
                 tags=[tag.name for tag in q.tags],
-                created_at=q.created_at,
+                created_at=None,
                 needs_review=q.needs_review
             )
             for q in quotes
@@ -1,26 +1,64 @@
 
 import unicodedata
 import re
-from typing import Optional, Union
+from functools import lru_cache
+from itertools import islice
+from typing import Optional, Union, List
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models import Quote, Author, Tag, User, Category
+from models import Quote, Author, Tag, User, Category, SessionFactory
 from errors import ValidationError, DuplicateError
 
 
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Author name sanitization patterns, compiled once instead of looked up per call
+_AUTHOR_DISALLOWED_RE = re.compile(r"[^a-zA-Z\s\-\.]")
+_MULTI_SPACE_RE = re.compile(r'\s+')
+
+# Deletes every ASCII character a tag can't contain - one C-level str.translate pass
+_TAG_NAME_DELETE = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if not ('a' <= c <= 'z' or '0' <= c <= '9')
+))
+
+# Columns each type's duplicate check compares, and whether the match ignores case
+_DUPLICATE_COLUMNS = {
+    Quote: ((Quote.text, False),),
+    Author: ((Author.name, True),),
+    Tag: ((Tag.name, True),),
+    User: ((User.name, False), (User.email, False)),
+    Category: ((Category.name, True),),
+}
+
+# Values per IN (...) list - well under SQLite's bound-parameter limit
+_IN_BATCH_SIZE = 10_000
+
+# Distinct names remembered by each sanitizer
+SANITIZE_CACHE_SIZE = 4096
+
+
+def _blank(value: Optional[str]) -> bool:
+    """True for None, empty or whitespace-only strings - without allocating a stripped copy"""
+    return not value or value.isspace()
+
+
 class Validator:
     """Validates and sanitizes domain objects before persistence"""
     
-    def __init__(self, session: Session):
-        self.session = session
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session if session is not None else SessionFactory()
     
     def validate(self, obj: Union[Quote, Author, Tag, User, Category], 
-                 exclude_id: Optional[int] = None) -> Optional[Union[Quote, Author, Tag, User, Category]]:
+                 exclude_id: Optional[int] = None,
+                 check_duplicates: bool = True) -> Optional[Union[Quote, Author, Tag, User, Category]]:
         """
         Validate and sanitize an object
         
         Args:
             obj: Domain object to validate (Quote, Author, Tag, User, or Category)
             exclude_id: ID to exclude from duplicate check (for updates)
+            check_duplicates: If False, skip the duplicate query (the caller relies
+                on the unique constraints, or checks in bulk via validate_many)
         
         Returns:
             Sanitized object if valid, False if duplicate exists
@@ -29,26 +67,96 @@ class Validator:
             ValidationError: If validation fails
         """
         if isinstance(obj, Quote):
-            return self._validate_quote(obj, exclude_id=exclude_id)
+            return self._validate_quote(obj, exclude_id=exclude_id, check_duplicates=check_duplicates)
         elif isinstance(obj, Author):
-            return self._validate_author(obj, exclude_id=exclude_id)
+            return self._validate_author(obj, exclude_id=exclude_id, check_duplicates=check_duplicates)
         elif isinstance(obj, Tag):
-            return self._validate_tag(obj, exclude_id=exclude_id)
+            return self._validate_tag(obj, exclude_id=exclude_id, check_duplicates=check_duplicates)
         elif isinstance(obj, User):
-            return self._validate_user(obj, exclude_id=exclude_id)
+            return self._validate_user(obj, exclude_id=exclude_id, check_duplicates=check_duplicates)
         elif isinstance(obj, Category):
-            return self._validate_category(obj, exclude_id=exclude_id)
+            return self._validate_category(obj, exclude_id=exclude_id, check_duplicates=check_duplicates)
         else:
             raise ValidationError(f"Unknown object type: {type(obj)}")
     
+    def validate_many(self, objs: list, check_duplicates: bool = True) -> List[Optional[Union[Quote, Author, Tag, User, Category]]]:
+        """
+        Validate and sanitize many objects, checking duplicates in bulk
+        
+        Duplicates are found with one SELECT ... WHERE col IN (...) per type and
+        column instead of one query per object.
+        
+        Args:
+            objs: Domain objects to validate, of any mix of supported types
+            check_duplicates: If False, only validate and sanitize
+        
+        Returns:
+            One result per object, as validate() - the sanitized object, or False
+            if it duplicates an existing row or an earlier object in objs
+            
+        Raises:
+            ValidationError: If any object fails validation
+        """
+        # Load every referenced author in one query - the identity map then answers
+        # each quote's author check (the list keeps them referenced meanwhile)
+        author_ids = {obj.author_id for obj in objs if isinstance(obj, Quote) and obj.author_id}
+        authors = self.session.query(Author).filter(Author.id.in_(author_ids)).all() if author_ids else []
+        
+        results = [self.validate(obj, check_duplicates=False) for obj in objs]
+        del authors
+        if not check_duplicates:
+            return results
+        
+        for model, columns in _DUPLICATE_COLUMNS.items():
+            indexes = [i for i, obj in enumerate(results) if isinstance(obj, model)]
+            if not indexes:
+                continue
+            
+            taken = []
+            for column, ignore_case in columns:
+                # Match in SQL with lower() on both sides, then key the stored values in
+                # Python - never compare SQL lower() output with str.lower() output
+                values = {getattr(results[i], column.key) for i in indexes}
+                existing = set()
+                batches = iter(values)
+                while batch := list(islice(batches, _IN_BATCH_SIZE)):
+                    if ignore_case:
+                        matches = func.lower(column).in_([func.lower(value) for value in batch])
+                    else:
+                        matches = column.in_(batch)
+                    existing.update(
+                        self._duplicate_key(value, ignore_case)
+                        for value, in self.session.query(column).filter(matches)
+                    )
+                taken.append(existing)
+            
+            for i in indexes:
+                keys = [self._duplicate_key(getattr(results[i], column.key), ignore_case) for column, ignore_case in columns]
+                if any(key in seen for key, seen in zip(keys, taken)):
+                    results[i] = False  # Duplicate exists
+                else:
+                    for key, seen in zip(keys, taken):
+                        seen.add(key)
+        
+        return results
+    
+    @staticmethod
+    def _duplicate_key(value: str, ignore_case: bool) -> str:
+        """A column value as validate_many compares it"""
+        return value.lower() if ignore_case else value
+    
+    def _exists(self, query) -> bool:
+        """Check a duplicate query with SELECT EXISTS instead of loading a full row"""
+        return self.session.query(query.exists()).scalar()
+    
     # ============================================================================
     # QUOTE VALIDATION
     # ============================================================================
     
-    def _validate_quote(self, quote: Quote, exclude_id: Optional[int] = None) -> Optional[Quote]:
+    def _validate_quote(self, quote: Quote, exclude_id: Optional[int] = None, check_duplicates: bool = True) -> Optional[Quote]:
         """Validate and sanitize a Quote object"""
         # Validate text
-        if not quote.text or not quote.text.strip():
+        if _blank(quote.text):
             raise ValidationError("Quote text cannot be empty")
         
         if len(quote.text) > 5000:
@@ -56,17 +164,6 @@ class Validator:
         
         quote.text = quote.text.strip()
         
-        # Check for duplicate by exact text match (exclude current quote on updates)
-        existing = self.session.query(Quote).filter(
-            Quote.text == quote.text
-        )
-        
-        if exclude_id:
-            existing = existing.filter(Quote.id != exclude_id)
-        
-        if existing.first():
-            return False  # Duplicate exists
-        
         # Validate source if provided
         if quote.source and len(quote.source) > 300:
             raise ValidationError("Source cannot exceed 300 characters")
@@ -74,35 +171,51 @@ class Validator:
         if quote.source:
             quote.source = quote.source.strip()
         
-        # Validate author exists
+        # Validate author exists (identity map first, so prefetched authors cost nothing)
         if quote.author_id:
-            author = self.session.query(Author).filter(Author.id == quote.author_id).first()
+            author = self.session.get(Author, quote.author_id)
             if not author:
                 raise ValidationError(f"Author with ID {quote.author_id} does not exist")
         
+        # Check for duplicate by exact text match (exclude current quote on updates) -
+        # last, so invalid quotes are rejected without a duplicate query
+        if check_duplicates:
+            existing = self.session.query(Quote).filter(
+                Quote.text == quote.text
+            )
+            
+            if exclude_id:
+                existing = existing.filter(Quote.id != exclude_id)
+            
+            if self._exists(existing):
+                return False  # Duplicate exists
+        
         return quote
     
     # ============================================================================
     # AUTHOR VALIDATION
     # ============================================================================
     
-    def _validate_author(self, author: Author, exclude_id: Optional[int] = None) -> Optional[Author]:
+    def _validate_author(self, author: Author, exclude_id: Optional[int] = None, check_duplicates: bool = True) -> Optional[Author]:
         """Validate and sanitize an Author object"""
-        if not author.name or not author.name.strip():
+        if _blank(author.name):
             raise ValidationError("Author name cannot be empty")
         
         # Sanitize name
         author.name = self._sanitize_author_name(author.name)
         
+        if not check_duplicates:
+            return author
+        
         # Check for duplicate (case-insensitive, exclude self on updates)
         existing = self.session.query(Author).filter(
-            Author.name.ilike(author.name)
+            func.lower(Author.name) == func.lower(author.name)
         )
         
         if exclude_id:
             existing = existing.filter(Author.id != exclude_id)
         
-        if existing.first():
+        if self._exists(existing):
             return False  # Duplicate exists
         
         return author
@@ -111,23 +224,26 @@ class Validator:
     # TAG VALIDATION
     # ============================================================================
     
-    def _validate_tag(self, tag: Tag, exclude_id: Optional[int] = None) -> Optional[Tag]:
+    def _validate_tag(self, tag: Tag, exclude_id: Optional[int] = None, check_duplicates: bool = True) -> Optional[Tag]:
         """Validate and sanitize a Tag object"""
-        if not tag.name or not tag.name.strip():
+        if _blank(tag.name):
             raise ValidationError("Tag name cannot be empty")
         
         # Sanitize name
         tag.name = self._sanitize_tag_name(tag.name)
         
+        if not check_duplicates:
+            return tag
+        
         # Check for duplicate (case-insensitive, exclude self on updates)
         existing = self.session.query(Tag).filter(
-            Tag.name.ilike(tag.name)
+            func.lower(Tag.name) == func.lower(tag.name)
         )
         
         if exclude_id:
             existing = existing.filter(Tag.id != exclude_id)
         
-        if existing.first():
+        if self._exists(existing):
             return False  # Duplicate exists
         
         return tag
@@ -136,10 +252,10 @@ class Validator:
     # USER VALIDATION
     # ============================================================================
     
-    def _validate_user(self, user: User, exclude_id: Optional[int] = None) -> Optional[User]:
+    def _validate_user(self, user: User, exclude_id: Optional[int] = None, check_duplicates: bool = True) -> Optional[User]:
         """Validate and sanitize a User object"""
         # Validate name
-        if not user.name or not user.name.strip():
+        if _blank(user.name):
             raise ValidationError("Name cannot be empty")
         
         if len(user.name) < 3:
@@ -148,21 +264,24 @@ class Validator:
         user.name = user.name.strip()
         
         # Validate email
-        if not user.email or "@" not in user.email:
-            raise ValidationError("Invalid email format")
+        user.email = (user.email or '').strip().lower()
         
-        user.email = user.email.strip().lower()
+        if _EMAIL_RE.match(user.email) is None:
+            raise ValidationError("Invalid email format")
         
-        # Check for duplicates (exclude self on updates)
-        existing = self.session.query(User).filter(
-            (User.name == user.name) | (User.email == user.email)
-        )
+        if not check_duplicates:
+            return user
         
-        if exclude_id:
-            existing = existing.filter(User.id != exclude_id)
-        
-        if existing.first():
-            return False  # Duplicate exists
+        # Check for duplicates (exclude self on updates) - one probe per unique
+        # column so each stays an index lookup, stopping at the first hit
+        for column, value in ((User.name, user.name), (User.email, user.email)):
+            existing = self.session.query(User).filter(column == value)
+            
+            if exclude_id:
+                existing = existing.filter(User.id != exclude_id)
+            
+            if self._exists(existing):
+                return False  # Duplicate exists
         
         return user
     
@@ -170,9 +289,9 @@ class Validator:
     # CATEGORY VALIDATION
     # ============================================================================
     
-    def _validate_category(self, category: Category, exclude_id: Optional[int] = None) -> Optional[Category]:
+    def _validate_category(self, category: Category, exclude_id: Optional[int] = None, check_duplicates: bool = True) -> Optional[Category]:
         """Validate and sanitize a Category object"""
-        if not category.name or not category.name.strip():
+        if _blank(category.name):
             raise ValidationError("Category name cannot be empty")
         
         if len(category.name) > 50:
@@ -180,15 +299,18 @@ class Validator:
         
         category.name = category.name.strip()
         
+        if not check_duplicates:
+            return category
+        
         # Check for duplicate (case-insensitive, exclude self on updates)
         existing = self.session.query(Category).filter(
-            Category.name.ilike(category.name)
+            func.lower(Category.name) == func.lower(category.name)
         )
         
         if exclude_id:
             existing = existing.filter(Category.id != exclude_id)
         
-        if existing.first():
+        if self._exists(existing):
             return False  # Duplicate exists
         
         return category
@@ -196,8 +318,12 @@ class Validator:
     # ============================================================================
     # SANITIZATION METHODS
     # ============================================================================
+    # Pure functions of the name, memoized across all validators - imports repeat
+    # the same tag and author names many times. Rejected names raise every time.
     
-    def _sanitize_tag_name(self, name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+    def _sanitize_tag_name(name: str) -> str:
         """
         Sanitize tag name:
         - Lowercase
@@ -205,16 +331,15 @@ class Validator:
         - Single word (no spaces)
         - No punctuation or symbols (only alphanumeric)
         """
-        name = name.lower().strip()
+        name = name.lower()
         
-        # Remove non-English characters
-        name = ''.join(
-            c for c in unicodedata.normalize('NFKD', name)
-            if ord(c) < 128
-        )
+        # Remove non-English characters (accents decompose to their base letter first) -
+        # plain ASCII names, the common case, are already normalized and skip this
+        if not name.isascii():
+            name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
         
         # Keep only alphanumeric
-        name = re.sub(r'[^a-z0-9]', '', name)
+        name = name.translate(_TAG_NAME_DELETE)
         
         if not name:
             raise ValidationError("Tag must contain at least one alphanumeric character")
@@ -224,7 +349,9 @@ class Validator:
         
         return name
     
-    def _sanitize_author_name(self, name: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+    def _sanitize_author_name(name: str) -> str:
         """
         Sanitize author name:
         - Remove non-English characters
@@ -234,31 +361,32 @@ class Validator:
         - Add period after single letters and abbreviations
         - Only allow: letters, spaces, hyphens, periods
         """
-        # Remove non-English characters
-        name = ''.join(
-            c for c in unicodedata.normalize('NFKD', name)
-            if ord(c) < 128 or c.isspace()
-        )
+        # Remove non-English characters in one C-level encode pass - Unicode whitespace
+        # still separates words, so it becomes a plain space first. ASCII names skip this.
+        if not name.isascii():
+            name = _MULTI_SPACE_RE.sub(' ', unicodedata.normalize('NFKD', name))
+            name = name.encode('ascii', 'ignore').decode('ascii')
         
         # Remove non-allowed characters
-        name = re.sub(r"[^a-zA-Z\s\-\.]", "", name)
-        
-        # Split into parts (by spaces and hyphens) but preserve delimiters
-        parts = re.split(r'(\s+|-)', name)
+        name = _AUTHOR_DISALLOWED_RE.sub("", name)
         
+        # Words are split out with C-level str.split() - on whitespace, then on hyphens.
+        # Spacing is normalized while building - no leading, doubled or trailing
+        # spaces, none after a hyphen or before a period - so no cleanup passes follow
         sanitized_parts = []
-        for part in parts:
-            if not part:
-                continue
+        for group in name.split():
+            if sanitized_parts and sanitized_parts[-1] != '-':
+                sanitized_parts.append(' ')
             
-            if part.isspace():
-                if not sanitized_parts or sanitized_parts[-1] != ' ':
-                    sanitized_parts.append(' ')
-            elif part == '-':
-                sanitized_parts.append('-')
-            else:
+            for i, part in enumerate(group.split('-')):
+                if i:
+                    sanitized_parts.append('-')
+                if not part:
+                    continue
+                
                 # It's a word/abbreviation
-                part = part.strip()
+                if part[0] == '.' and sanitized_parts and sanitized_parts[-1] == ' ':
+                    sanitized_parts.pop()
                 
                 if len(part) == 1:
                     # Single letter - capitalize and add period
@@ -273,16 +401,5 @@ class Validator:
                     # Regular word - capitalize first letter, lowercase rest
                     sanitized_parts.append(part.capitalize())
         
-        # Join and clean up spacing
-        result = ''.join(sanitized_parts)
-        result = re.sub(r'\s+', ' ', result)
-        result = re.sub(r'\s+\.', '.', result)
-        result = re.sub(r'-\s+', '-', result)
-        
-        # Capitalize letter after hyphen
-        def capitalize_after_hyphen(match):
-            return match.group(1) + match.group(2).upper()
-        
-        result = re.sub(r'(-\s*)([a-z])', capitalize_after_hyphen, result)
-        
-        return result.strip()
+        # Every word is capitalized above, so a hyphen is never followed by a lowercase letter
+        return ''.join(sanitized_parts)